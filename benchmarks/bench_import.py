@@ -0,0 +1,247 @@
+"""Import time benchmark for the Korea Bus integration.
+
+Imports the modules Home Assistant loads at startup (the integration, its
+config flow, the sensor platform and diagnostics) under ``python -X
+importtime`` and reports what they add to startup:
+
+- cumulative import time per module, median over several runs
+- the slowest modules imported on their behalf
+- the top-level packages pulled in beyond what Home Assistant already loads
+
+``homeassistant`` is replaced by empty stub modules, so only the cost of the
+integration and its own dependencies is measured, and the benchmark runs
+without Home Assistant installed.
+
+Usage:
+    python benchmarks/bench_import.py --runs 5
+    python benchmarks/bench_import.py --baseline benchmarks/import_baseline.json
+
+With ``--baseline`` the imported packages are compared against a previous
+run and the script exits with status 1 when a new one is imported at
+startup. ``--write-baseline`` stores the current run as the new baseline.
+"""
+from __future__ import annotations
+
+import argparse
+import importlib
+import importlib.abc
+import importlib.machinery
+import json
+from pathlib import Path
+import statistics
+import subprocess
+import sys
+import types
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Modules Home Assistant imports at startup
+TARGETS = (
+    "custom_components.korea_bus",
+    "custom_components.korea_bus.config_flow",
+    "custom_components.korea_bus.sensor",
+    "custom_components.korea_bus.diagnostics",
+)
+
+# Already loaded by Home Assistant core before any integration
+PRELOADED = (
+    "asyncio",
+    "aiohttp",
+    "collections.abc",
+    "datetime",
+    "hashlib",
+    "json",
+    "logging",
+    "random",
+    "typing",
+    "urllib.parse",
+    "voluptuous",
+    "yarl",
+)
+
+# Stub packages that also provide submodules as attributes
+STUB_PACKAGES = {
+    "homeassistant",
+    "homeassistant.components",
+    "homeassistant.helpers",
+    "homeassistant.util",
+}
+
+MARKER = "korea_bus-import-start"
+
+
+class _StubMeta(type):
+    """Metaclass answering any attribute with another stub."""
+
+    def __getattr__(cls, name):
+        if name.startswith("__"):
+            raise AttributeError(name)
+        return _stub(name)
+
+    def __call__(cls, *args, **kwargs):
+        # Decorators such as @callback hand the function straight back
+        if len(args) == 1 and not kwargs and isinstance(args[0], types.FunctionType):
+            return args[0]
+        return super().__call__(*args, **kwargs)
+
+
+class _Stub(metaclass=_StubMeta):
+    """Base of every stubbed Home Assistant name."""
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__()
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def __class_getitem__(cls, item):
+        return cls
+
+    def __getattr__(self, name):
+        return _stub(name)
+
+
+def _stub(name: str) -> type:
+    return _StubMeta(name, (_Stub,), {})
+
+
+class _StubFinder(importlib.abc.MetaPathFinder, importlib.abc.Loader):
+    """Serve every ``homeassistant`` module as an empty stub."""
+
+    def find_spec(self, fullname, path, target=None):
+        if fullname != "homeassistant" and not fullname.startswith("homeassistant."):
+            return None
+        return importlib.machinery.ModuleSpec(fullname, self, is_package=True)
+
+    def create_module(self, spec):
+        return None
+
+    def exec_module(self, module):
+        name = module.__name__
+
+        def __getattr__(attr):
+            if attr.startswith("__"):
+                raise AttributeError(attr)
+            if name in STUB_PACKAGES and attr.islower():
+                return importlib.import_module(f"{name}.{attr}")
+            return _stub(attr)
+
+        module.__getattr__ = __getattr__
+        module.__path__ = []
+
+
+def child() -> None:
+    """Import the targets; runs in the ``-X importtime`` subprocess."""
+    sys.path.insert(0, str(ROOT))
+    sys.meta_path.insert(0, _StubFinder())
+    # __import__ goes through the import statement path that -X importtime times
+    for name in PRELOADED:
+        __import__(name)
+    print(MARKER, file=sys.stderr, flush=True)
+    for name in TARGETS:
+        __import__(name)
+
+
+def parse_importtime(stderr: str) -> list[tuple[str, int, int, int]]:
+    """Return (module, depth, self us, cumulative us) of the imports after the marker."""
+    lines = stderr.splitlines()
+    rows = []
+    for line in lines[lines.index(MARKER) + 1:]:
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative, name = line[len("import time:"):].split("|", 2)
+        depth = (len(name) - len(name.lstrip())) // 2
+        rows.append((name.strip(), depth, int(self_us), int(cumulative)))
+    return rows
+
+
+def run_once() -> list[tuple[str, int, int, int]]:
+    """Import the targets in a fresh interpreter."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", __file__, "--child"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return parse_importtime(result.stderr)
+
+
+def new_packages(rows: list[tuple[str, int, int, int]]) -> list[str]:
+    """Return the top-level packages imported beyond the stubs and the integration."""
+    return sorted({
+        name.split(".")[0]
+        for name, _, _, _ in rows
+        if name.split(".")[0] not in ("custom_components", "homeassistant")
+        and name.split(".")[0] not in sys.stdlib_module_names
+    })
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10, help="slowest modules to list")
+    parser.add_argument("--json", help="write the results to this file")
+    parser.add_argument("--baseline", help="compare against this baseline file")
+    parser.add_argument("--write-baseline", help="write the results as a baseline file")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child()
+        return 0
+
+    runs = [run_once() for _ in range(args.runs)]
+    # Only top-level imports after the marker count, their children are included
+    totals = [sum(row[3] for row in rows if row[1] == 0) for rows in runs]
+    targets = {
+        name: statistics.median(
+            next((row[3] for row in rows if row[0] == name), 0) for rows in runs
+        )
+        for name in TARGETS
+    }
+    slowest: dict[str, list[int]] = {}
+    for rows in runs:
+        for name, _, self_us, _ in rows:
+            slowest.setdefault(name, []).append(self_us)
+    slowest_rows = sorted(
+        ((name, statistics.median(times)) for name, times in slowest.items()),
+        key=lambda item: item[1],
+        reverse=True,
+    )[: args.top]
+    packages = new_packages(runs[0])
+
+    print(f"startup import time: {statistics.median(totals) / 1000:.1f} ms "
+          f"(min {min(totals) / 1000:.1f} ms over {args.runs} runs)")
+    print()
+    print(f"{'module':<48} {'cumulative ms':>14}")
+    for name, cumulative in targets.items():
+        print(f"{name:<48} {cumulative / 1000:>14.2f}")
+    print()
+    print(f"{'slowest module':<48} {'self ms':>14}")
+    for name, self_us in slowest_rows:
+        print(f"{name:<48} {self_us / 1000:>14.2f}")
+    print()
+    print("third-party packages imported: " + (", ".join(packages) or "none"))
+
+    result = {
+        "total_ms": round(statistics.median(totals) / 1000, 2),
+        "modules_ms": {name: round(value / 1000, 2) for name, value in targets.items()},
+        "packages": packages,
+    }
+    if args.json:
+        Path(args.json).write_text(json.dumps(result, indent=2))
+    if args.write_baseline:
+        Path(args.write_baseline).write_text(
+            json.dumps({"packages": packages}, indent=2) + "\n"
+        )
+    if args.baseline:
+        allowed = set(json.loads(Path(args.baseline).read_text())["packages"])
+        if added := sorted(set(packages) - allowed):
+            print(f"REGRESSION: new packages imported at startup: {', '.join(added)}")
+            return 1
+        print("baseline OK")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
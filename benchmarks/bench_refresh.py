@@ -0,0 +1,285 @@
+"""Refresh benchmark for the Korea Bus integration.
+
+Runs the real hub, coordinators and sensor entities against the local Kakao
+stand-in and reports, per number of stops:
+
+- refresh latency of a round in which every stop refreshes
+- requests sent and bytes decoded per round
+- state writes per round
+- CPU time per entity spent handling coordinator updates
+- parse time of the searchView and busStationInfo scrapes
+
+Usage:
+    python benchmarks/bench_refresh.py --stops 1,10,50,200 --rounds 5
+    python benchmarks/bench_refresh.py --baseline benchmarks/baseline.json
+
+With ``--baseline`` the deterministic counters are compared against a
+previous run and the script exits with status 1 on a regression.
+``--write-baseline`` stores the current run as the new baseline.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+from datetime import timedelta
+import json
+import logging
+from pathlib import Path
+import statistics
+import sys
+import tempfile
+import time
+from types import SimpleNamespace
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from homeassistant.const import EVENT_STATE_CHANGED  # noqa: E402
+from homeassistant.core import HomeAssistant  # noqa: E402
+
+from custom_components.korea_bus import get_hub  # noqa: E402
+from custom_components.korea_bus.client import get_client  # noqa: E402
+from custom_components.korea_bus import fetcher, hub as hub_module, kakao  # noqa: E402
+from custom_components.korea_bus.const import (  # noqa: E402
+    DOMAIN,
+    DATA_CONFIG,
+    CONF_STOPS,
+    CONF_BUS_STOP_ID,
+    CONF_BUS_NUMBER,
+    CONF_MAX_IN_FLIGHT,
+    CONF_RATE_LIMIT,
+    DEFAULT_SCAN_INTERVAL,
+)
+from custom_components.korea_bus.coordinator import BusDataUpdateCoordinator  # noqa: E402
+from custom_components.korea_bus.parse_stage import get_parse_stage  # noqa: E402
+from custom_components.korea_bus.scraper import (  # noqa: E402
+    parse_bus_number_list,
+    parse_bus_stop_list,
+)
+from custom_components.korea_bus.sensor import create_bus_entities  # noqa: E402
+from kakao_standin import KakaoStandIn  # noqa: E402
+
+_LOGGER = logging.getLogger("bench_refresh")
+
+# Counters that do not depend on the machine and are checked against a baseline
+REGRESSION_KEYS = ("requests_per_round", "bytes_decoded_per_round", "state_writes_per_round")
+
+
+async def _async_set_time_zone(hass: HomeAssistant, time_zone: str) -> None:
+    if hasattr(hass.config, "async_set_time_zone"):
+        await hass.config.async_set_time_zone(time_zone)
+    else:
+        hass.config.set_time_zone(time_zone)
+
+
+def _decoded_bytes(hass: HomeAssistant) -> int:
+    return sum(timing.bytes for timing in get_parse_stage(hass).timings.values())
+
+
+async def run_case(stops: int, args: argparse.Namespace) -> dict:
+    """Benchmark one number of stops."""
+    standin = KakaoStandIn(
+        latency=args.latency,
+        error_rate=args.error_rate,
+        routes=args.routes,
+        search_items=args.search_items,
+        static=args.static,
+    )
+    base_url = await standin.start()
+    kakao.BASE_URL = fetcher.BASE_URL = f"{base_url}/busesInBusStopJson"
+    # Every round must reach the stand-in instead of the hub's short cache
+    hub_module.HUB_CACHE_TTL = 0
+
+    with tempfile.TemporaryDirectory() as config_dir:
+        hass = HomeAssistant(config_dir)
+        await _async_set_time_zone(hass, "Asia/Seoul")
+        hass.data.setdefault(DOMAIN, {})[DATA_CONFIG] = {
+            CONF_MAX_IN_FLIGHT: args.max_in_flight,
+            CONF_RATE_LIMIT: args.rate_limit,
+        }
+        hub = get_hub(hass)
+
+        listener_cpu = 0.0
+
+        def timed(original):
+            def async_update_listeners() -> None:
+                nonlocal listener_cpu
+                start = time.process_time()
+                original()
+                listener_cpu += time.process_time() - start
+            return async_update_listeners
+
+        tracked = standin.route_names[: args.tracked]
+        coordinators = []
+        entries = []
+        for index in range(0, stops, args.stops_per_entry):
+            entry = SimpleNamespace(
+                entry_id=f"bench{index}",
+                data={
+                    CONF_STOPS: [
+                        {CONF_BUS_STOP_ID: f"BS{stop:05d}", CONF_BUS_NUMBER: tracked}
+                        for stop in range(index, min(index + args.stops_per_entry, stops))
+                    ]
+                },
+                options={},
+            )
+            coordinator = BusDataUpdateCoordinator(
+                hass,
+                hub,
+                entry,
+                _LOGGER,
+                name=DOMAIN,
+                update_interval=timedelta(seconds=DEFAULT_SCAN_INTERVAL),
+            )
+            coordinator.async_update_listeners = timed(coordinator.async_update_listeners)
+            coordinator.async_subscribe()
+            coordinators.append(coordinator)
+            entries.append(entry)
+
+        await asyncio.gather(*(coordinator.async_refresh() for coordinator in coordinators))
+        entities = [
+            entity
+            for coordinator, entry in zip(coordinators, entries)
+            for entity in create_bus_entities(coordinator, entry)
+        ]
+        # Attach entities directly; a bare hass has no entity platform set up
+        for index, entity in enumerate(entities):
+            entity.hass = hass
+            entity.entity_id = f"sensor.{DOMAIN}_{index}"
+            await entity.async_added_to_hass()
+            entity.async_write_ha_state()
+        await hass.async_block_till_done()
+
+        writes = 0
+
+        def count_write(_event) -> None:
+            nonlocal writes
+            writes += 1
+
+        hass.bus.async_listen(EVENT_STATE_CHANGED, count_write)
+
+        latencies = []
+        requests = decoded = 0
+        listener_cpu = 0.0
+        for round_index in range(1, args.rounds + 1):
+            standin.round = round_index
+            requests_before = standin.requests
+            decoded_before = _decoded_bytes(hass)
+            start = time.perf_counter()
+            await asyncio.gather(*(coordinator.async_refresh() for coordinator in coordinators))
+            await hass.async_block_till_done()
+            latencies.append(time.perf_counter() - start)
+            requests += standin.requests - requests_before
+            decoded += _decoded_bytes(hass) - decoded_before
+
+        scrape = await _async_scrape(hass, base_url, args.rounds)
+
+        for coordinator in coordinators:
+            coordinator.async_unsubscribe()
+        await hass.async_stop(force=True)
+    await standin.stop()
+
+    return {
+        "stops": stops,
+        "coordinators": len(coordinators),
+        "entities": len(entities),
+        "refresh_latency_ms": round(statistics.mean(latencies) * 1000, 2),
+        "refresh_latency_max_ms": round(max(latencies) * 1000, 2),
+        "requests_per_round": requests / args.rounds,
+        "errors": standin.errors,
+        "bytes_decoded_per_round": decoded / args.rounds,
+        "state_writes_per_round": writes / args.rounds,
+        "cpu_per_entity_us": round(listener_cpu / args.rounds / len(entities) * 1e6, 2),
+        **scrape,
+    }
+
+
+async def _async_scrape(hass: HomeAssistant, base_url: str, rounds: int) -> dict:
+    """Time the config flow scrapers on the stand-in pages."""
+    session = get_client(hass)
+    parse_stage = get_parse_stage(hass)
+    result = {}
+    for kind, parser in (
+        ("searchView", parse_bus_stop_list),
+        ("busStationInfo", parse_bus_number_list),
+    ):
+        for _ in range(rounds):
+            async with session.get(f"{base_url}/{kind}") as response:
+                html = await response.text()
+            await parse_stage.async_parse(kind, parser, html)
+        timing = parse_stage.timings[kind]
+        result[f"{kind}_parse_ms"] = round(timing.total / timing.count * 1000, 3)
+    return result
+
+
+def check_baseline(results: list[dict], baseline: dict, tolerance: float) -> list[str]:
+    """Return the regressions of the deterministic counters."""
+    failures = []
+    for result in results:
+        expected = baseline.get(str(result["stops"]))
+        if expected is None:
+            continue
+        for key in REGRESSION_KEYS:
+            if key in expected and result[key] > expected[key] * (1 + tolerance):
+                failures.append(
+                    f"{result['stops']} stops: {key} {result[key]} > baseline {expected[key]}"
+                )
+    return failures
+
+
+async def async_main(args: argparse.Namespace) -> int:
+    logging.basicConfig(level=logging.WARNING)
+    logging.getLogger("homeassistant.helpers.entity").setLevel(logging.ERROR)
+    results = [await run_case(stops, args) for stops in args.stops]
+
+    columns = list(results[0])
+    print("  ".join(columns))
+    for result in results:
+        print("  ".join(str(result[column]) for column in columns))
+
+    if args.json:
+        Path(args.json).write_text(json.dumps(results, indent=2) + "\n")
+    if args.write_baseline:
+        Path(args.write_baseline).write_text(
+            json.dumps(
+                {str(r["stops"]): {key: r[key] for key in REGRESSION_KEYS} for r in results},
+                indent=2,
+            )
+            + "\n"
+        )
+    if args.baseline:
+        failures = check_baseline(
+            results, json.loads(Path(args.baseline).read_text()), args.tolerance
+        )
+        for failure in failures:
+            print(f"REGRESSION {failure}", file=sys.stderr)
+        return 1 if failures else 0
+    return 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--stops", type=lambda v: [int(s) for s in v.split(",")], default=[1, 10, 50, 200]
+    )
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--routes", type=int, default=10, help="routes served per stop")
+    parser.add_argument("--tracked", type=int, default=2, help="routes tracked per stop")
+    parser.add_argument(
+        "--stops-per-entry", type=int, default=1, help="stops combined in one config entry"
+    )
+    parser.add_argument("--search-items", type=int, default=40)
+    parser.add_argument("--latency", type=float, default=0.02, help="seconds per request")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--static", action="store_true", help="serve unchanged payloads")
+    parser.add_argument("--max-in-flight", type=int, default=8)
+    parser.add_argument("--rate-limit", type=float, default=0)
+    parser.add_argument("--json", help="write the results to this file")
+    parser.add_argument("--baseline", help="compare against this baseline file")
+    parser.add_argument("--write-baseline", help="write the results as a baseline file")
+    parser.add_argument("--tolerance", type=float, default=0.1)
+    return asyncio.run(async_main(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,146 @@
+"""Local stand-in for the Kakao endpoints used by the Korea Bus integration.
+
+Serves the fixtures in ``fixtures/``, shaped like recorded responses of
+``busesInBusStopJson``, ``searchView`` and ``busStationInfo``, with
+configurable latency, error rate and payload size. Arrival times shift
+with every round so refreshes see changing data; ``static=True`` serves
+identical payloads instead.
+"""
+from __future__ import annotations
+
+import asyncio
+import copy
+from datetime import datetime
+import json
+from pathlib import Path
+import random
+import re
+from zoneinfo import ZoneInfo
+
+from aiohttp import web
+
+FIXTURES = Path(__file__).parent / "fixtures"
+KST = ZoneInfo("Asia/Seoul")
+ITEM_RE = re.compile(r"[ \t]*<li\b.*?</li>\n?", re.S)
+
+
+class KakaoStandIn:
+    """aiohttp server imitating the Kakao map endpoints."""
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        error_rate: float = 0.0,
+        routes: int = 3,
+        search_items: int = 4,
+        static: bool = False,
+        seed: int = 0,
+    ) -> None:
+        self.latency = latency
+        self.error_rate = error_rate
+        self.static = static
+        self.round = 0
+        self.requests = 0
+        self.errors = 0
+        self.bytes_sent = 0
+        self._random = random.Random(seed)
+        self._runner: web.AppRunner | None = None
+
+        buses = json.loads((FIXTURES / "busesInBusStopJson.json").read_text("utf-8"))
+        self._routes = _scale(buses["busesList"], routes)
+        self._search = _scale_items(
+            (FIXTURES / "searchView.html").read_text("utf-8"), search_items
+        )
+        self._station = (FIXTURES / "busStationInfo.html").read_text("utf-8")
+
+    @property
+    def route_names(self) -> list[str]:
+        """Return the bus numbers served for every stop."""
+        return [route["name"] for route in self._routes]
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        """Start serving and return the base URL."""
+        app = web.Application()
+        app.router.add_get("/actions/busesInBusStopJson", self._buses)
+        app.router.add_get("/actions/searchView", self._search_view)
+        app.router.add_get("/actions/busStationInfo", self._station_info)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, host, port).start()
+        host, port = self._runner.addresses[0][:2]
+        return f"http://{host}:{port}/actions"
+
+    async def stop(self) -> None:
+        """Stop serving."""
+        if self._runner is not None:
+            await self._runner.cleanup()
+
+    async def _respond(self, body: str, content_type: str) -> web.Response:
+        self.requests += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if self.error_rate and self._random.random() < self.error_rate:
+            self.errors += 1
+            return web.Response(status=503)
+        data = body.encode("utf-8")
+        self.bytes_sent += len(data)
+        return web.Response(body=data, content_type=content_type, charset="utf-8")
+
+    async def _buses(self, request: web.Request) -> web.Response:
+        bus_stop_id = request.query.get("busStopId", "")
+        return await self._respond(
+            json.dumps(
+                {"busStopId": bus_stop_id, "busesList": self._buses_list()},
+                ensure_ascii=False,
+            ),
+            "application/json",
+        )
+
+    async def _search_view(self, request: web.Request) -> web.Response:
+        return await self._respond(self._search, "text/html")
+
+    async def _station_info(self, request: web.Request) -> web.Response:
+        return await self._respond(self._station, "text/html")
+
+    def _buses_list(self) -> list[dict]:
+        if self.static:
+            return self._routes
+        collected = datetime.now(KST).strftime("%Y%m%d%H%M%S")
+        routes = []
+        for route in self._routes:
+            route = dict(route)
+            for key, collect_key in (
+                ("arrivalTime", "collectDateTime"),
+                ("arrivalTime2", "collectDateTime2"),
+            ):
+                arrival_time = int(route[key])
+                if arrival_time > 0:
+                    # Each round moves the bus one minute closer, then restarts
+                    route[key] = str(60 + (arrival_time - 60 * self.round) % 1800)
+                route[collect_key] = collected
+            routes.append(route)
+        return routes
+
+
+def _scale(routes: list[dict], count: int) -> list[dict]:
+    """Repeat the recorded routes under new bus numbers up to ``count`` routes."""
+    scaled = []
+    for index in range(count):
+        route = copy.deepcopy(routes[index % len(routes)])
+        if index >= len(routes):
+            route["name"] = f"{route['name']}-{index // len(routes)}"
+        scaled.append(route)
+    return scaled
+
+
+def _scale_items(html: str, count: int) -> str:
+    """Repeat the ``<li>`` items of a page, with unique ids, up to ``count`` items."""
+    items = list(ITEM_RE.finditer(html))
+    head, tail = html[: items[0].start()], html[items[-1].end():]
+    scaled = []
+    for index in range(count):
+        item = items[index % len(items)].group(0)
+        if index >= len(items):
+            item = item.replace('data-id="', f'data-id="{index // len(items)}-', 1)
+        scaled.append(item)
+    return head + "".join(scaled) + tail
@@ -1,34 +1,190 @@
 """The Korea Bus integration."""
+from datetime import datetime, timedelta
 import logging
+import random
+
+import voluptuous as vol
 
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
-from homeassistant.const import Platform
+from homeassistant.core import CoreState, HomeAssistant
+from homeassistant.const import CONF_SCAN_INTERVAL, Platform
+from homeassistant.helpers.event import async_call_later
 
-from .const import DOMAIN
+from .const import (
+    DOMAIN,
+    CONF_STOPS,
+    CONF_BUS_STOP_ID,
+    CONF_BUS_NUMBER,
+    DATA_CONFIG,
+    DATA_HUB,
+    DATA_HISTORY,
+    CONF_MAX_IN_FLIGHT,
+    CONF_RATE_LIMIT,
+    CONF_HISTORY,
+    CONF_HISTORY_RETENTION,
+    CONF_ETA_CORRECTION,
+    CONF_JOURNEY_SENSORS,
+    CONF_EVENTS,
+    DEFAULT_SCAN_INTERVAL,
+    DEFAULT_MAX_IN_FLIGHT,
+    DEFAULT_RATE_LIMIT,
+    DEFAULT_HISTORY,
+    DEFAULT_HISTORY_RETENTION,
+    DEFAULT_ETA_CORRECTION,
+    DEFAULT_JOURNEY_SENSORS,
+    DEFAULT_EVENTS,
+    STARTUP_REFRESH_SPREAD,
+)
+from .client import get_client
+from .coordinator import BusDataUpdateCoordinator
+from .fetcher import BusFetchEngine
+from .hub import KoreaBusHub
+from .parse_stage import get_parse_stage
+from .services import async_setup_services
+from .snapshot import async_get_snapshot_store
+from .transitions import get_transition_tracker
+from .vehicles import get_vehicle_index
 
 PLATFORMS: list[Platform] = [Platform.SENSOR]
 
+CONFIG_SCHEMA = vol.Schema(
+    {
+        DOMAIN: vol.Schema({
+            vol.Optional(CONF_MAX_IN_FLIGHT, default=DEFAULT_MAX_IN_FLIGHT): vol.All(
+                int, vol.Range(min=1)
+            ),
+            vol.Optional(CONF_RATE_LIMIT, default=DEFAULT_RATE_LIMIT): vol.All(
+                vol.Coerce(float), vol.Range(min=0)
+            ),
+            vol.Optional(
+                CONF_HISTORY_RETENTION, default=DEFAULT_HISTORY_RETENTION
+            ): vol.All(int, vol.Range(min=1)),
+        })
+    },
+    extra=vol.ALLOW_EXTRA,
+)
+
 _LOGGER = logging.getLogger(__name__)
 
 
+def get_hub(hass: HomeAssistant) -> KoreaBusHub:
+    """Return the shared polling hub, creating it on first use."""
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    if DATA_HUB not in domain_data:
+        conf = domain_data.get(DATA_CONFIG, {})
+        engine = BusFetchEngine(
+            get_client(hass),
+            conf.get(CONF_MAX_IN_FLIGHT, DEFAULT_MAX_IN_FLIGHT),
+            conf.get(CONF_RATE_LIMIT, DEFAULT_RATE_LIMIT),
+            get_parse_stage(hass),
+        )
+        domain_data[DATA_HUB] = KoreaBusHub(hass, engine)
+    return domain_data[DATA_HUB]
+
+
 async def async_setup(hass: HomeAssistant, config: dict):
     """Set up the Korea Bus component."""
-    hass.data.setdefault(DOMAIN, {})
+    hass.data.setdefault(DOMAIN, {})[DATA_CONFIG] = config.get(DOMAIN, {})
+    async_setup_services(hass)
     return True
 
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry):
     """Set up Korea Bus from a config entry."""
-    hass.data.setdefault(DOMAIN, {})[entry.entry_id] = {}
+    snapshots = await async_get_snapshot_store(hass)
+    # The history log and the ETA correction load numpy, so only import them when used
+    history = None
+    if entry.options.get(CONF_HISTORY, DEFAULT_HISTORY):
+        from .history import async_get_history
+
+        history = await async_get_history(hass)
+    corrector = None
+    if entry.options.get(CONF_ETA_CORRECTION, DEFAULT_ETA_CORRECTION):
+        from .correction import async_get_corrector
+
+        corrector = await async_get_corrector(hass)
+    coordinator = BusDataUpdateCoordinator(
+        hass,
+        get_hub(hass),
+        entry,
+        _LOGGER,
+        name=DOMAIN,
+        update_interval=timedelta(
+            seconds=entry.options.get(CONF_SCAN_INTERVAL, DEFAULT_SCAN_INTERVAL)
+        ),
+        snapshots=snapshots,
+        history=history,
+        corrector=corrector,
+        vehicles=(
+            get_vehicle_index(hass)
+            if entry.options.get(CONF_JOURNEY_SENSORS, DEFAULT_JOURNEY_SENSORS)
+            else None
+        ),
+        transitions=(
+            get_transition_tracker(hass)
+            if entry.options.get(CONF_EVENTS, DEFAULT_EVENTS)
+            else None
+        ),
+    )
+    coordinator.async_subscribe()
+
+    # Entities start from the last known arrivals; live data follows in the background
+    coordinator.async_restore({
+        bus_stop_id: snapshots.get(entry.entry_id, bus_stop_id)
+        for bus_stop_id in coordinator.stops
+    })
+
+    hass.data[DOMAIN][entry.entry_id] = coordinator
+    entry.async_on_unload(entry.add_update_listener(async_reload_entry))
 
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
+
+    async def async_first_refresh(_now: datetime) -> None:
+        await coordinator.async_refresh()
+
+    # Spread the first requests of all entries while Home Assistant starts
+    delay = 0 if hass.state is CoreState.running else random.uniform(0, STARTUP_REFRESH_SPREAD)
+    entry.async_on_unload(async_call_later(hass, delay, async_first_refresh))
     return True
 
 
+async def async_migrate_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
+    """Migrate an old config entry."""
+    if entry.version == 1:
+        # Version 1 held a single stop; version 2 holds a list of stops
+        data = {
+            CONF_STOPS: [{
+                CONF_BUS_STOP_ID: entry.data[CONF_BUS_STOP_ID],
+                CONF_BUS_NUMBER: entry.data.get(CONF_BUS_NUMBER, []),
+            }]
+        }
+        hass.config_entries.async_update_entry(entry, data=data, version=2)
+        _LOGGER.debug("설정 항목 %s 버전 2로 변환 완료", entry.entry_id)
+    return True
+
+
+async def async_reload_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Reload a config entry when its options change."""
+    await hass.config_entries.async_reload(entry.entry_id)
+
+
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Forget the snapshot of a removed config entry."""
+    (await async_get_snapshot_store(hass)).async_remove(entry.entry_id)
+
+
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry):
     """Unload a config entry."""
     if unload_ok := await hass.config_entries.async_unload_platforms(entry, PLATFORMS):
-        hass.data[DOMAIN].pop(entry.entry_id)
-    
+        coordinator = hass.data[DOMAIN].pop(entry.entry_id)
+        coordinator.async_unsubscribe()
+        if coordinator.history is not None and not any(
+            isinstance(other, BusDataUpdateCoordinator) and other.history is not None
+            for other in hass.data[DOMAIN].values()
+        ):
+            # The last entry recording history stops its flush timer; the log
+            # is dropped after its rows are written so a new one reads them
+            await coordinator.history.async_close()
+            hass.data[DOMAIN].pop(DATA_HISTORY, None)
+
     return unload_ok
@@ -0,0 +1,80 @@
+"""Arrival aggregates across routes and stops for Korea Bus."""
+from __future__ import annotations
+
+from datetime import datetime
+
+from .projection import RouteArrival, parse_int
+
+
+class UpcomingArrival:
+    """One approaching vehicle of any selected route."""
+
+    __slots__ = ("arrival_at", "bus_stop_id", "bus_number", "remain_seat", "vehicle_number")
+
+    def __init__(self, arrival_at: datetime, bus_stop_id: str, bus_number: str, vehicle) -> None:
+        """Initialize the arrival."""
+        self.arrival_at = arrival_at
+        self.bus_stop_id = bus_stop_id
+        self.bus_number = bus_number
+        self.remain_seat = _seats(vehicle.remain_seat)
+        self.vehicle_number = vehicle.vehicle_number
+
+    def as_dict(self) -> dict:
+        """Return the arrival as entity attributes."""
+        return {
+            "bus_number": self.bus_number,
+            "bus_stop_id": self.bus_stop_id,
+            "arrival_datetime": self.arrival_at.isoformat(),
+            "remain_seat": self.remain_seat,
+        }
+
+
+class ArrivalSummary:
+    """The next arrivals of the selected routes, ordered by arrival time."""
+
+    __slots__ = ("upcoming", "next_seat")
+
+    def __init__(self, upcoming: tuple, next_seat: UpcomingArrival | None) -> None:
+        """Initialize the summary."""
+        self.upcoming = upcoming
+        self.next_seat = next_seat
+
+    @property
+    def earliest(self) -> UpcomingArrival | None:
+        """Return the first arrival of any selected route."""
+        return self.upcoming[0] if self.upcoming else None
+
+
+def summarize_arrivals(
+    data: dict[str, dict[str, RouteArrival]],
+    selection: set[str],
+    count: int,
+    exclude: set[str],
+) -> ArrivalSummary:
+    """Merge the first and second vehicles of the selected routes.
+
+    ``selection`` holds ``bus_stop_id:bus_number`` keys; an empty selection
+    includes every tracked route. Stops in ``exclude`` are skipped.
+    """
+    arrivals = sorted(
+        (
+            UpcomingArrival(vehicle.arrival_at, bus_stop_id, bus_number, vehicle)
+            for bus_stop_id, routes in data.items()
+            if bus_stop_id not in exclude
+            for bus_number, route in routes.items()
+            if not selection or f"{bus_stop_id}:{bus_number}" in selection
+            for vehicle in route.vehicles
+            if vehicle.arrival_at is not None
+        ),
+        key=lambda arrival: arrival.arrival_at,
+    )
+    # A full bus is no answer to where the next seat is
+    next_seat = next((arrival for arrival in arrivals if arrival.remain_seat), None)
+    return ArrivalSummary(tuple(arrivals[:count]), next_seat)
+
+
+def _seats(value) -> int | None:
+    """Return the remaining seats, or None when Kakao does not report them."""
+    seats = parse_int(value)
+    # Kakao reports -1 for buses without seat information
+    return seats if seats is not None and seats >= 0 else None
@@ -0,0 +1,85 @@
+"""Per-stop circuit breaker for Korea Bus."""
+from __future__ import annotations
+
+import random
+import time
+
+from .const import (
+    BREAKER_FAILURE_THRESHOLD,
+    BREAKER_BASE_BACKOFF,
+    BREAKER_MAX_BACKOFF,
+)
+
+STATE_CLOSED = "closed"
+STATE_OPEN = "open"
+STATE_HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of fetching a stop whose circuit is open."""
+
+
+class CircuitBreaker:
+    """Stop requesting a failing bus stop and probe it with backoff.
+
+    The circuit opens after ``threshold`` consecutive failures. While open
+    no request is sent until the next probe, which is scheduled with
+    exponential backoff and jitter so stops that failed together do not
+    retry together. A successful probe closes the circuit again.
+    """
+
+    def __init__(
+        self,
+        threshold: int = BREAKER_FAILURE_THRESHOLD,
+        base_backoff: float = BREAKER_BASE_BACKOFF,
+        max_backoff: float = BREAKER_MAX_BACKOFF,
+    ) -> None:
+        """Initialize the breaker."""
+        self.threshold = threshold
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.state = STATE_CLOSED
+        self.failures = 0
+        self.opened = 0
+        self.retry_at = 0.0
+        # Wall clock time of the next probe, for display
+        self.retry_time = 0.0
+
+    def allow_request(self) -> bool:
+        """Return whether a request may be sent now."""
+        if self.state == STATE_OPEN and time.monotonic() >= self.retry_at:
+            self.state = STATE_HALF_OPEN
+        return self.state != STATE_OPEN
+
+    def retry_in(self) -> float:
+        """Return the seconds until the next probe while open."""
+        if self.state != STATE_OPEN:
+            return 0.0
+        return max(0.0, self.retry_at - time.monotonic())
+
+    def record_success(self) -> None:
+        """Close the circuit after a successful request."""
+        self.state = STATE_CLOSED
+        self.failures = 0
+        self.opened = 0
+
+    def record_failure(self) -> None:
+        """Count a failure and open the circuit when it keeps failing."""
+        self.failures += 1
+        if self.state == STATE_HALF_OPEN or self.failures >= self.threshold:
+            delay = min(self.max_backoff, self.base_backoff * 2 ** self.opened)
+            # Equal jitter: wait between half and all of the backoff
+            wait = delay / 2 + random.uniform(0, delay / 2)
+            self.retry_at = time.monotonic() + wait
+            self.retry_time = time.time() + wait
+            self.opened += 1
+            self.state = STATE_OPEN
+
+    def as_dict(self) -> dict:
+        """Return the breaker state for diagnostics."""
+        return {
+            "state": self.state,
+            "failures": self.failures,
+            "opened": self.opened,
+            "retry_in": round(self.retry_in(), 1),
+        }
@@ -0,0 +1,54 @@
+"""Shared HTTP client for Korea Bus."""
+from __future__ import annotations
+
+import aiohttp
+
+from homeassistant.const import EVENT_HOMEASSISTANT_CLOSE
+from homeassistant.core import Event, HomeAssistant
+from homeassistant.util.ssl import get_default_context
+
+from .const import (
+    DOMAIN,
+    DATA_CLIENT,
+    BASE_HEADER,
+    CLIENT_LIMIT,
+    CLIENT_LIMIT_PER_HOST,
+    CLIENT_DNS_CACHE_TTL,
+    CLIENT_KEEPALIVE,
+    CLIENT_TIMEOUT,
+    CLIENT_CONNECT_TIMEOUT,
+)
+
+
+def get_client(hass: HomeAssistant) -> aiohttp.ClientSession:
+    """Return the session used for every Kakao request, creating it on first use.
+
+    The config flow scrapes and the polling share its connector, so
+    connections to Kakao are kept alive between requests and steps instead
+    of being opened per flow step. Requests carry the browser headers,
+    accept compressed bodies and are bound by one timeout policy. The
+    session is closed when Home Assistant shuts down.
+    """
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    if DATA_CLIENT not in domain_data:
+        connector = aiohttp.TCPConnector(
+            limit=CLIENT_LIMIT,
+            limit_per_host=CLIENT_LIMIT_PER_HOST,
+            ttl_dns_cache=CLIENT_DNS_CACHE_TTL,
+            keepalive_timeout=CLIENT_KEEPALIVE,
+            ssl=get_default_context(),
+        )
+        session = aiohttp.ClientSession(
+            connector=connector,
+            headers={**BASE_HEADER, "Accept-Encoding": "gzip, deflate"},
+            timeout=aiohttp.ClientTimeout(
+                total=CLIENT_TIMEOUT, sock_connect=CLIENT_CONNECT_TIMEOUT
+            ),
+        )
+
+        async def async_close(_event: Event) -> None:
+            await session.close()
+
+        hass.bus.async_listen_once(EVENT_HOMEASSISTANT_CLOSE, async_close)
+        domain_data[DATA_CLIENT] = session
+    return domain_data[DATA_CLIENT]
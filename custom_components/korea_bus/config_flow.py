@@ -1,17 +1,13 @@
 """Config flow for Korea Bus integration."""
 import logging
-import re
 import voluptuous as vol
 import aiohttp
 import asyncio
 import urllib.parse
 
-from bs4 import BeautifulSoup
-
 from homeassistant import config_entries
 from homeassistant.core import callback
 from homeassistant.const import CONF_SCAN_INTERVAL
-from homeassistant.helpers.aiohttp_client import async_create_clientsession
 import homeassistant.helpers.config_validation as cv
 
 from .const import (
@@ -20,11 +16,46 @@ from .const import (
     CONF_BUS_STOP,
     CONF_BUS_STOP_ID,
     CONF_BUS_NUMBER,
+    CONF_STOPS,
+    CONF_ADD_STOP,
+    CONF_ADAPTIVE_INTERVAL,
+    CONF_MIN_INTERVAL,
+    CONF_MAX_INTERVAL,
+    CONF_COUNTDOWN_INTERVAL,
+    CONF_STATE_TOLERANCE,
+    CONF_DIAGNOSTIC_SENSORS,
+    CONF_AGGREGATE_SENSORS,
+    CONF_AGGREGATE_ROUTES,
+    CONF_AGGREGATE_COUNT,
+    CONF_HISTORY,
+    CONF_ETA_CORRECTION,
+    CONF_ATTRIBUTE_PROFILE,
+    CONF_JOURNEY_SENSORS,
+    CONF_EVENTS,
+    CONF_APPROACH_STOPS,
+    CONF_APPROACH_THRESHOLDS,
+    ATTRIBUTE_PROFILES,
     DEFAULT_SCAN_INTERVAL,
+    DEFAULT_ADAPTIVE_INTERVAL,
+    DEFAULT_MIN_INTERVAL,
+    DEFAULT_MAX_INTERVAL,
+    DEFAULT_COUNTDOWN_INTERVAL,
+    DEFAULT_STATE_TOLERANCE,
+    DEFAULT_DIAGNOSTIC_SENSORS,
+    DEFAULT_AGGREGATE_SENSORS,
+    DEFAULT_AGGREGATE_COUNT,
+    DEFAULT_HISTORY,
+    DEFAULT_ETA_CORRECTION,
+    DEFAULT_ATTRIBUTE_PROFILE,
+    DEFAULT_JOURNEY_SENSORS,
+    DEFAULT_EVENTS,
+    DEFAULT_APPROACH_STOPS,
     STATION_URL,
     SEARCH_URL,
-    BASE_HEADER
 )
+from .client import get_client
+from .parse_stage import get_parse_stage
+from .transitions import parse_thresholds
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -32,74 +63,83 @@ _LOGGER = logging.getLogger(__name__)
 class KoreaBusConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
     """Handle a config flow for Korea Bus."""
 
-    VERSION = 1
-    _bus_data: dict = dict()
+    VERSION = 2
+
+    def __init__(self):
+        """Initialize the config flow."""
+        self._bus_data: dict = {}
+        # Bus numbers selected per bus stop ID
+        self._stops: dict[str, list[str]] = {}
 
     async def fetch_bus_stop_list(self, session: aiohttp.ClientSession, bus_stop_name: str) -> dict[str, dict]:
         """Fetch the list of bus stops."""
         url = f"{SEARCH_URL}?q={urllib.parse.quote(bus_stop_name)}&lvl=2#!/all/list/bus"
 
-        async with session.get(url, headers=BASE_HEADER, timeout=10) as response:
+        async with session.get(url) as response:
             if response.status != 200:
                 _LOGGER.error("Fetching bus stop list failed with status code: %s", response.status)
                 return 
             
-            soup = BeautifulSoup(await response.text(), "html.parser")
-            bus_stops = soup.find_all("li", class_="search_item")
+            from .scraper import parse_bus_stop_list
 
-            results = {}
-            for stop in bus_stops:
-                data_id = stop.get("data-id")
-                data_title = stop.get("data-title")
-            
-                stop_number_element = stop.find("span", class_="screen_out", string="버스 정류장 번호 : ")
-                stop_number = stop_number_element.next_sibling.strip() \
-                    if stop_number_element and isinstance(stop_number_element.next_sibling, str) else None
-            
-                direction_element = stop.find("span", class_="txt_bar")
-                direction = direction_element.next_sibling.strip() \
-                    if direction_element and isinstance(direction_element.next_sibling, str) else None
-            
-                location = stop.find("span", class_="txt_ginfo").text.strip() if stop.find("span", class_="txt_ginfo") else "Unknown"
-                bus_types = [bus_type.text for bus_type in stop.find_all("span", class_=lambda x: x and x.startswith("bus_type"))]
-            
-                # "Unknown"이 아닌 경우만 결과에 추가
-                if stop_number and direction:
-                    results[data_id] = {
-                        "stop_number": stop_number,
-                        "direction": direction,
-                        "location": location,
-                        "bus_types": bus_types,
-                        "title": f"{data_title}({stop_number}) - {direction}"
-                    }
-            return results
+            return await get_parse_stage(self.hass).async_parse(
+                "searchView", parse_bus_stop_list, await response.text()
+            )
     
     async def fetch_bus_number_list(self, session: aiohttp.ClientSession, bus_stop_id: str) -> list[dict]:
         """Fetch the list of bus numbers."""
         url = f"{STATION_URL}?busStopId={bus_stop_id}"
 
-        async with session.get(url, timeout=10) as response:
+        async with session.get(url) as response:
             if response.status != 200:
                 _LOGGER.error("Fetching bus number list failed with status code: %s", response.status)
                 return 
             
-            soup = BeautifulSoup(await response.text(), "html.parser")
-            bus_items = soup.find_all("li", {"data-id": True})
+            from .scraper import parse_bus_number_list
+
+            return await get_parse_stage(self.hass).async_parse(
+                "busStationInfo", parse_bus_number_list, await response.text()
+            )
     
-            buses = []
-            for bus in bus_items:
-                bus_number = bus.find("strong", {"class": "tit_g"})
-                if bus_number:
-                    bus_type_elem = bus.find("span", {'class': re.compile("bus_type.*")})
-                    bus_type = bus_type_elem.text if bus_type_elem else "Unknown"
-            
-                    bus_info = {
-                        "number": bus_number.text.strip(),
-                        "type": bus_type.strip()
-                    }
-                    buses.append(bus_info)
+    async def _async_search_bus_stops(self, bus_stop_name: str) -> dict[str, dict]:
+        """Search bus stops, answering from the local index when possible."""
+        # The flow module is imported at startup; the search code only when a flow runs
+        from .stop_index import async_get_stop_index
+
+        index = await async_get_stop_index(self.hass)
+        if (results := index.search(bus_stop_name)) is not None:
+            _LOGGER.debug("정류장 검색 결과를 캐시에서 가져왔습니다: %s", bus_stop_name)
+            return results
+
+        try:
+            results = await self.fetch_bus_stop_list(
+                get_client(self.hass), bus_stop_name
+            )
+        except (asyncio.TimeoutError, aiohttp.ClientError):
+            # Fall back to stops seen before while Kakao is unreachable
+            if results := index.match(bus_stop_name):
+                return results
+            raise
+
+        if results:
+            index.async_add_search(bus_stop_name, results)
+        return results
+
+    async def _async_get_bus_numbers(self, bus_stop_id: str) -> list[dict]:
+        """Return the bus numbers of a stop, answering from the local index when possible."""
+        from .stop_index import async_get_stop_index
+
+        index = await async_get_stop_index(self.hass)
+        if (buses := index.buses(bus_stop_id)) is not None:
             return buses
-    
+
+        buses = await self.fetch_bus_number_list(
+            get_client(self.hass), bus_stop_id
+        )
+        if buses:
+            index.async_add_buses(bus_stop_id, buses)
+        return buses
+
     async def async_step_user(self, user_input=None):
         """Handle the initial step."""
         errors = {}
@@ -108,9 +148,7 @@ class KoreaBusConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
             bus_stop_name = user_input[CONF_BUS_STOP_NAME]
 
             try:
-                self._bus_data[CONF_BUS_STOP] = await self.fetch_bus_stop_list(
-                    async_create_clientsession(self.hass), bus_stop_name
-                )
+                self._bus_data[CONF_BUS_STOP] = await self._async_search_bus_stops(bus_stop_name)
                 if not self._bus_data[CONF_BUS_STOP]:
                     errors["base"] = "no_bus_stop"
                 else:
@@ -142,8 +180,8 @@ class KoreaBusConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
             self._bus_data[CONF_BUS_STOP_ID] = user_input[CONF_BUS_STOP]
 
             try:
-                self._bus_data[CONF_BUS_NUMBER] = await self.fetch_bus_number_list(
-                    async_create_clientsession(self.hass), self._bus_data[CONF_BUS_STOP_ID]
+                self._bus_data[CONF_BUS_NUMBER] = await self._async_get_bus_numbers(
+                    self._bus_data[CONF_BUS_STOP_ID]
                 )
                 return await self.async_step_select_number()
 
@@ -171,16 +209,8 @@ class KoreaBusConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         errors = {}
 
         if user_input is not None:
-            self._bus_data[CONF_BUS_NUMBER] = user_input[CONF_BUS_NUMBER]
-
-            unique_id = f"{self._bus_data[CONF_BUS_STOP_ID]}_{''.join(self._bus_data[CONF_BUS_NUMBER])}"
-            await self.async_set_unique_id(unique_id)
-            self._abort_if_unique_id_configured()
-
-            return self.async_create_entry(
-                title=f"버스(대중교통) 도착 정보 정류장 {self._bus_data[CONF_BUS_STOP_ID]}",
-                data=self._bus_data,
-            )
+            self._stops[self._bus_data[CONF_BUS_STOP_ID]] = user_input[CONF_BUS_NUMBER]
+            return await self.async_step_add_stop()
         
         bus_options = {
             bus["number"]: f"{bus['type']} {bus['number']}"
@@ -195,6 +225,36 @@ class KoreaBusConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
             errors=errors
         )
     
+    async def async_step_add_stop(self, user_input=None):
+        """Offer to add another bus stop to the same entry."""
+        if user_input is not None:
+            if user_input[CONF_ADD_STOP]:
+                return await self.async_step_user()
+
+            unique_id = "-".join(
+                f"{bus_stop_id}_{''.join(bus_numbers)}"
+                for bus_stop_id, bus_numbers in self._stops.items()
+            )
+            await self.async_set_unique_id(unique_id)
+            self._abort_if_unique_id_configured()
+
+            return self.async_create_entry(
+                title=f"버스(대중교통) 도착 정보 정류장 {', '.join(self._stops)}",
+                data={
+                    CONF_STOPS: [
+                        {CONF_BUS_STOP_ID: bus_stop_id, CONF_BUS_NUMBER: bus_numbers}
+                        for bus_stop_id, bus_numbers in self._stops.items()
+                    ]
+                },
+            )
+
+        return self.async_show_form(
+            step_id="add_stop",
+            data_schema=vol.Schema({
+                vol.Optional(CONF_ADD_STOP, default=False): bool,
+            }),
+        )
+
     @staticmethod
     @callback
     def async_get_options_flow(config_entry):
@@ -211,15 +271,98 @@ class KoreaBusOptionsFlow(config_entries.OptionsFlow):
 
     async def async_step_init(self, user_input=None):
         """Manage the options."""
+        errors = {}
+
         if user_input is not None:
-            return self.async_create_entry(title="", data=user_input)
+            try:
+                parse_thresholds(user_input.get(CONF_APPROACH_THRESHOLDS))
+            except ValueError:
+                errors["base"] = "invalid_thresholds"
+            if user_input[CONF_MIN_INTERVAL] > user_input[CONF_MAX_INTERVAL]:
+                errors["base"] = "invalid_interval_range"
+            elif not errors:
+                return self.async_create_entry(title="", data=user_input)
 
+        options = self.config_entry.options
+        # Aggregate sensors may cover any tracked route of any stop
+        routes = {
+            f"{stop[CONF_BUS_STOP_ID]}:{bus_number}": f"{bus_number} ({stop[CONF_BUS_STOP_ID]})"
+            for stop in self.config_entry.data[CONF_STOPS]
+            for bus_number in stop[CONF_BUS_NUMBER]
+        }
         return self.async_show_form(
             step_id="init",
             data_schema=vol.Schema({
                 vol.Optional(
                     CONF_SCAN_INTERVAL,
-                    default=self.config_entry.options.get(CONF_SCAN_INTERVAL, DEFAULT_SCAN_INTERVAL),
+                    default=options.get(CONF_SCAN_INTERVAL, DEFAULT_SCAN_INTERVAL),
                 ): int,
+                vol.Optional(
+                    CONF_ADAPTIVE_INTERVAL,
+                    default=options.get(CONF_ADAPTIVE_INTERVAL, DEFAULT_ADAPTIVE_INTERVAL),
+                ): bool,
+                vol.Optional(
+                    CONF_MIN_INTERVAL,
+                    default=options.get(CONF_MIN_INTERVAL, DEFAULT_MIN_INTERVAL),
+                ): vol.All(int, vol.Range(min=5)),
+                vol.Optional(
+                    CONF_MAX_INTERVAL,
+                    default=options.get(CONF_MAX_INTERVAL, DEFAULT_MAX_INTERVAL),
+                ): vol.All(int, vol.Range(min=5)),
+                vol.Optional(
+                    CONF_COUNTDOWN_INTERVAL,
+                    default=options.get(CONF_COUNTDOWN_INTERVAL, DEFAULT_COUNTDOWN_INTERVAL),
+                ): vol.All(int, vol.Range(min=0)),
+                vol.Optional(
+                    CONF_STATE_TOLERANCE,
+                    default=options.get(CONF_STATE_TOLERANCE, DEFAULT_STATE_TOLERANCE),
+                ): vol.All(int, vol.Range(min=0)),
+                vol.Optional(
+                    CONF_DIAGNOSTIC_SENSORS,
+                    default=options.get(CONF_DIAGNOSTIC_SENSORS, DEFAULT_DIAGNOSTIC_SENSORS),
+                ): bool,
+                vol.Optional(
+                    CONF_ATTRIBUTE_PROFILE,
+                    default=options.get(CONF_ATTRIBUTE_PROFILE, DEFAULT_ATTRIBUTE_PROFILE),
+                ): vol.In(ATTRIBUTE_PROFILES),
+                vol.Optional(
+                    CONF_AGGREGATE_SENSORS,
+                    default=options.get(CONF_AGGREGATE_SENSORS, DEFAULT_AGGREGATE_SENSORS),
+                ): bool,
+                vol.Optional(
+                    CONF_AGGREGATE_ROUTES,
+                    default=[
+                        route for route in options.get(CONF_AGGREGATE_ROUTES, []) if route in routes
+                    ],
+                ): cv.multi_select(routes),
+                vol.Optional(
+                    CONF_AGGREGATE_COUNT,
+                    default=options.get(CONF_AGGREGATE_COUNT, DEFAULT_AGGREGATE_COUNT),
+                ): vol.All(int, vol.Range(min=1, max=20)),
+                vol.Optional(
+                    CONF_JOURNEY_SENSORS,
+                    default=options.get(CONF_JOURNEY_SENSORS, DEFAULT_JOURNEY_SENSORS),
+                ): bool,
+                vol.Optional(
+                    CONF_EVENTS,
+                    default=options.get(CONF_EVENTS, DEFAULT_EVENTS),
+                ): bool,
+                vol.Optional(
+                    CONF_APPROACH_STOPS,
+                    default=options.get(CONF_APPROACH_STOPS, DEFAULT_APPROACH_STOPS),
+                ): vol.All(int, vol.Range(min=1, max=30)),
+                vol.Optional(
+                    CONF_APPROACH_THRESHOLDS,
+                    default=options.get(CONF_APPROACH_THRESHOLDS, ""),
+                ): str,
+                vol.Optional(
+                    CONF_HISTORY,
+                    default=options.get(CONF_HISTORY, DEFAULT_HISTORY),
+                ): bool,
+                vol.Optional(
+                    CONF_ETA_CORRECTION,
+                    default=options.get(CONF_ETA_CORRECTION, DEFAULT_ETA_CORRECTION),
+                ): bool,
             }),
+            errors=errors,
         )
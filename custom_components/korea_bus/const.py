@@ -5,6 +5,8 @@ CONF_BUS_STOP_NAME = "bus_stop_name"
 CONF_BUS_STOP_ID = "bus_stop_id"
 CONF_BUS_STOP = "bus_stop"
 CONF_BUS_NUMBER = "bus_number"
+CONF_STOPS = "stops"
+CONF_ADD_STOP = "add_stop"
 
 DEFAULT_SCAN_INTERVAL = 60
 BASE_URL = "https://m.map.kakao.com/actions/busesInBusStopJson"
@@ -13,4 +15,172 @@ STATION_URL = "https://m.map.kakao.com/actions/busStationInfo"
 
 BASE_HEADER = {
     "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/89.0.4389.82 Safari/537.36"
-}
\ No newline at end of file
+}
+
+DATA_CONFIG = "config"
+DATA_HUB = "hub"
+DATA_CLIENT = "client"
+
+# Connection pool of the shared HTTP client; Kakao is a single host
+CLIENT_LIMIT = 20
+CLIENT_LIMIT_PER_HOST = 10
+CLIENT_DNS_CACHE_TTL = 300
+# Kept above the default scan interval so polled connections are reused
+CLIENT_KEEPALIVE = 75
+# Seconds per request, and for opening a connection
+CLIENT_TIMEOUT = 10
+CLIENT_CONNECT_TIMEOUT = 5
+
+# Cached stop data younger than this (seconds) is served without a new request
+HUB_CACHE_TTL = 10
+# Stops requested within this window (seconds) are fetched in one batch
+FETCH_BATCH_WINDOW = 0.1
+
+CONF_MAX_IN_FLIGHT = "max_in_flight"
+CONF_RATE_LIMIT = "rate_limit"
+
+DEFAULT_MAX_IN_FLIGHT = 4
+# Requests per second to the Kakao host
+DEFAULT_RATE_LIMIT = 5
+
+CONF_ADAPTIVE_INTERVAL = "adaptive_interval"
+CONF_MIN_INTERVAL = "min_interval"
+CONF_MAX_INTERVAL = "max_interval"
+
+DEFAULT_ADAPTIVE_INTERVAL = False
+DEFAULT_MIN_INTERVAL = 15
+DEFAULT_MAX_INTERVAL = 600
+
+# Poll again after this fraction of the nearest arrival time
+ADAPTIVE_ETA_RATIO = 0.25
+# Wake up this many seconds before the first departure of the day
+SERVICE_START_MARGIN = 300
+# Keep a stop in service this many seconds after the last departure of its routes
+SERVICE_END_GRACE = 1800
+
+CONF_COUNTDOWN_INTERVAL = "countdown_interval"
+DEFAULT_COUNTDOWN_INTERVAL = 0
+
+# Kakao reports collectDateTime in Korea Standard Time
+KAKAO_TIME_ZONE = "Asia/Seoul"
+# collectDateTime values older than this (seconds) are not trusted as an anchor
+MAX_COLLECT_AGE = 600
+
+CONF_STATE_TOLERANCE = "state_tolerance"
+DEFAULT_STATE_TOLERANCE = 30
+
+DATA_STOP_INDEX = "stop_index"
+
+STORAGE_VERSION = 1
+STORAGE_KEY_STOP_INDEX = f"{DOMAIN}.stop_index"
+# Cached search results older than this (seconds) are fetched again
+STOP_INDEX_TTL = 7 * 24 * 3600
+# Number of recent search queries kept in the stop index
+STOP_INDEX_MAX_QUERIES = 200
+# Stops on one searchView result page; a full page may not hold every match
+SEARCH_PAGE_SIZE = 15
+
+DATA_PARSE_STAGE = "parse_stage"
+
+# Payloads of at least this many bytes/characters are parsed in the executor
+PARSE_EXECUTOR_THRESHOLD = 32 * 1024
+
+CONF_DIAGNOSTIC_SENSORS = "diagnostic_sensors"
+DEFAULT_DIAGNOSTIC_SENSORS = False
+
+# Consecutive failures after which a stop is no longer requested
+BREAKER_FAILURE_THRESHOLD = 3
+# Backoff (seconds) before the first probe of an open stop, doubled per failed probe
+BREAKER_BASE_BACKOFF = 30
+BREAKER_MAX_BACKOFF = 1800
+
+DATA_SNAPSHOTS = "snapshots"
+
+STORAGE_KEY_SNAPSHOTS = f"{DOMAIN}.snapshots"
+# Snapshots older than this (seconds) are not restored; matches the collect age
+SNAPSHOT_MAX_AGE = MAX_COLLECT_AGE
+# Each save restarts the delay, so while buses keep moving the snapshot is
+# only written when Home Assistant shuts down
+SNAPSHOT_SAVE_DELAY = 3600
+# First refreshes during startup are spread over this many seconds
+STARTUP_REFRESH_SPREAD = 10
+
+CONF_AGGREGATE_SENSORS = "aggregate_sensors"
+CONF_AGGREGATE_ROUTES = "aggregate_routes"
+CONF_AGGREGATE_COUNT = "aggregate_count"
+DEFAULT_AGGREGATE_SENSORS = False
+DEFAULT_AGGREGATE_COUNT = 3
+
+DATA_HISTORY = "history"
+
+CONF_HISTORY = "history"
+DEFAULT_HISTORY = False
+CONF_HISTORY_RETENTION = "history_retention_days"
+DEFAULT_HISTORY_RETENTION = 30
+
+# Buffered observations are written to disk this often (seconds)
+HISTORY_FLUSH_INTERVAL = 60
+# Rows per memory-mapped segment and the longest time span of one segment
+HISTORY_SEGMENT_ROWS = 1 << 16
+HISTORY_SEGMENT_SPAN = 86400
+# Observations of a vehicle further apart than this (seconds) belong to different trips
+HISTORY_TRIP_GAP = 1200
+# A trip whose last ETA was at most this (seconds) is taken as arrived
+HISTORY_ARRIVED_ETA = 120
+# Longer gaps between arrivals (seconds) are service breaks, not headways
+HISTORY_MAX_HEADWAY = 3 * 3600
+
+SERVICE_HISTORY_STATISTICS = "history_statistics"
+
+DATA_CORRECTOR = "corrector"
+
+CONF_ETA_CORRECTION = "eta_correction"
+DEFAULT_ETA_CORRECTION = False
+
+STORAGE_KEY_CORRECTION = f"{DOMAIN}.eta_correction"
+# Completed trips needed per route and hour before ETAs are corrected
+CORRECTION_MIN_SAMPLES = 5
+# Older errors weigh as at most this many samples, so the model keeps adapting
+CORRECTION_MAX_SAMPLES = 500
+# Predictions kept per approaching vehicle
+CORRECTION_MAX_PENDING = 30
+# Confidence is the chance the bus arrives within this many seconds of the correction
+CORRECTION_CONFIDENCE_WINDOW = 60
+CORRECTION_SAVE_DELAY = 60
+
+CONF_ATTRIBUTE_PROFILE = "attribute_profile"
+# Every attribute, with placeholders for values Kakao did not send
+PROFILE_FULL = "full"
+# Attributes that change between updates; route metadata gets its own entity
+PROFILE_DYNAMIC = "dynamic"
+# The arrival timestamp only
+PROFILE_MINIMAL = "minimal"
+ATTRIBUTE_PROFILES = [PROFILE_FULL, PROFILE_DYNAMIC, PROFILE_MINIMAL]
+DEFAULT_ATTRIBUTE_PROFILE = PROFILE_FULL
+
+DATA_VEHICLES = "vehicles"
+DATA_TRANSITIONS = "transitions"
+
+CONF_JOURNEY_SENSORS = "journey_sensors"
+DEFAULT_JOURNEY_SENSORS = False
+
+# Vehicles not listed at any stop for this many seconds are forgotten
+VEHICLE_EXPIRY = 1800
+
+CONF_EVENTS = "events"
+DEFAULT_EVENTS = False
+# Stops away at which korea_bus_approaching fires, and per route overrides
+CONF_APPROACH_STOPS = "approach_stops"
+DEFAULT_APPROACH_STOPS = 3
+CONF_APPROACH_THRESHOLDS = "approach_thresholds"
+
+EVENT_APPROACHING = f"{DOMAIN}_approaching"
+EVENT_ARRIVED = f"{DOMAIN}_arrived"
+EVENT_VEHICLE_CHANGED = f"{DOMAIN}_vehicle_changed"
+EVENT_LAST_VEHICLE = f"{DOMAIN}_last_vehicle"
+
+SERVICE_GET_ARRIVALS = "get_arrivals"
+# Stops looked up by the service without an entry are cached this long (seconds)
+LOOKUP_CACHE_TTL = 300
+LOOKUP_MAX_STOPS = 50
+DEFAULT_LOOKUP_MAX_AGE = 30
@@ -0,0 +1,448 @@
+"""Data update coordinator for Korea Bus."""
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+import logging
+from typing import TYPE_CHECKING
+import aiohttp
+import asyncio
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.event import async_track_time_interval
+from homeassistant.helpers.update_coordinator import (
+    DataUpdateCoordinator,
+    UpdateFailed,
+)
+from homeassistant.util import dt as dt_util
+
+from .const import (
+    CONF_STOPS,
+    CONF_BUS_STOP_ID,
+    CONF_BUS_NUMBER,
+    CONF_ADAPTIVE_INTERVAL,
+    CONF_MIN_INTERVAL,
+    CONF_MAX_INTERVAL,
+    CONF_COUNTDOWN_INTERVAL,
+    CONF_STATE_TOLERANCE,
+    CONF_AGGREGATE_SENSORS,
+    CONF_AGGREGATE_ROUTES,
+    CONF_AGGREGATE_COUNT,
+    CONF_APPROACH_STOPS,
+    CONF_APPROACH_THRESHOLDS,
+    DEFAULT_ADAPTIVE_INTERVAL,
+    DEFAULT_MIN_INTERVAL,
+    DEFAULT_MAX_INTERVAL,
+    DEFAULT_COUNTDOWN_INTERVAL,
+    DEFAULT_STATE_TOLERANCE,
+    DEFAULT_AGGREGATE_SENSORS,
+    DEFAULT_AGGREGATE_COUNT,
+    DEFAULT_APPROACH_STOPS,
+    SERVICE_START_MARGIN,
+)
+from .aggregate import ArrivalSummary, summarize_arrivals
+from .breaker import STATE_CLOSED
+from .hub import KoreaBusHub
+from .projection import RouteArrival, project_buses
+from .scheduler import ServiceCalendar, next_interval, service_calendar
+from .snapshot import SnapshotStore
+from .transitions import TransitionTracker, parse_thresholds
+from .vehicles import VehicleIndex
+
+if TYPE_CHECKING:
+    # Both load numpy; they are only imported when their option is enabled
+    from .correction import EtaCorrector
+    from .history import HistoryLog
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class BusDataUpdateCoordinator(DataUpdateCoordinator):
+    """Class to manage fetching bus data.
+
+    One coordinator serves every stop of a config entry. All stops are
+    refreshed together on one timer, and the data is keyed by bus stop ID
+    and then by bus number.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        hub: KoreaBusHub,
+        entry: ConfigEntry,
+        logger: logging.Logger,
+        name: str,
+        update_interval: timedelta,
+        snapshots: SnapshotStore | None = None,
+        history: HistoryLog | None = None,
+        corrector: EtaCorrector | None = None,
+        vehicles: VehicleIndex | None = None,
+        transitions: TransitionTracker | None = None,
+    ) -> None:
+        """Initialize the coordinator."""
+        super().__init__(
+            hass,
+            logger,
+            name=name,
+            update_interval=update_interval,
+            # Listeners are only notified when the projected data changes
+            always_update=False,
+        )
+        self.hub = hub
+        self.snapshots = snapshots
+        self.history = history
+        self.corrector = corrector
+        self.vehicles = vehicles
+        self.transitions = transitions
+        self.entry_id = entry.entry_id
+        self.base_interval = update_interval
+        # Bus numbers tracked per bus stop ID
+        self.stops: dict[str, list[str]] = {
+            stop[CONF_BUS_STOP_ID]: stop.get(CONF_BUS_NUMBER, [])
+            for stop in entry.data[CONF_STOPS]
+        }
+        # Stops served from their last good data because their circuit is open
+        self.stale: set[str] = set()
+        # Stops whose last fetch failed without data to fall back to
+        self.failed: set[str] = set()
+        self.adaptive = entry.options.get(CONF_ADAPTIVE_INTERVAL, DEFAULT_ADAPTIVE_INTERVAL)
+        self.min_interval = entry.options.get(CONF_MIN_INTERVAL, DEFAULT_MIN_INTERVAL)
+        self.max_interval = entry.options.get(CONF_MAX_INTERVAL, DEFAULT_MAX_INTERVAL)
+        self.countdown_interval = entry.options.get(
+            CONF_COUNTDOWN_INTERVAL, DEFAULT_COUNTDOWN_INTERVAL
+        )
+        self.state_tolerance = entry.options.get(
+            CONF_STATE_TOLERANCE, DEFAULT_STATE_TOLERANCE
+        )
+        self.approach_stops = entry.options.get(CONF_APPROACH_STOPS, DEFAULT_APPROACH_STOPS)
+        try:
+            self.approach_thresholds = parse_thresholds(
+                entry.options.get(CONF_APPROACH_THRESHOLDS)
+            )
+        except ValueError:
+            _LOGGER.warning(
+                "노선별 접근 기준 형식이 올바르지 않습니다: %s",
+                entry.options.get(CONF_APPROACH_THRESHOLDS),
+            )
+            self.approach_thresholds = {}
+        self.aggregate = entry.options.get(CONF_AGGREGATE_SENSORS, DEFAULT_AGGREGATE_SENSORS)
+        self.aggregate_routes = set(entry.options.get(CONF_AGGREGATE_ROUTES, []))
+        self.aggregate_count = entry.options.get(CONF_AGGREGATE_COUNT, DEFAULT_AGGREGATE_COUNT)
+        # Arrivals merged across the selected routes, rebuilt when the data changes
+        self.summary: ArrivalSummary | None = None
+        self._summary_source = None
+        self._buses_info: dict[str, list[dict]] = {}
+        self._anchors: dict[str, list[datetime]] = {}
+        # Combined service hours per stop, None when they are not known
+        self._calendars: dict[str, ServiceCalendar | None] = {}
+        self._unsub_countdown: CALLBACK_TYPE | None = None
+        # Registered listeners, counted here instead of read from the base class
+        self.listener_count = 0
+
+    @callback
+    def async_add_listener(self, update_callback, context=None) -> CALLBACK_TYPE:
+        """Listen for data updates and run the countdown while listened to."""
+        remove_listener = super().async_add_listener(update_callback, context)
+        self.listener_count += 1
+        self._async_schedule_countdown()
+
+        @callback
+        def remove_countdown_listener() -> None:
+            remove_listener()
+            self.listener_count -= 1
+            if not self.listener_count:
+                self._async_stop_countdown()
+
+        return remove_countdown_listener
+
+    @callback
+    def _async_schedule_countdown(self) -> None:
+        """Start the local countdown timer if it has something to count."""
+        if (
+            self._unsub_countdown is not None
+            or self.countdown_interval <= 0
+            or not self.listener_count
+            or not any(self._anchors.values())
+        ):
+            return
+        self._unsub_countdown = async_track_time_interval(
+            self.hass,
+            self._async_countdown_tick,
+            timedelta(seconds=self.countdown_interval),
+        )
+
+    @callback
+    def _async_stop_countdown(self) -> None:
+        """Stop the local countdown timer."""
+        if self._unsub_countdown is not None:
+            self._unsub_countdown()
+            self._unsub_countdown = None
+
+    @callback
+    def _async_countdown_tick(self, _now: datetime) -> None:
+        """Refresh entity states from the anchored ETAs."""
+        now = dt_util.now()
+        if not any(
+            anchor > now for anchors in self._anchors.values() for anchor in anchors
+        ):
+            self._async_stop_countdown()
+        self.async_update_listeners()
+
+    @callback
+    def async_update_listeners(self) -> None:
+        """Update all listeners and count them in the metrics of their stop."""
+        # Entities register with their bus stop ID as listener context
+        for bus_stop_id in self.async_contexts():
+            if (metrics := self.hub.metrics(bus_stop_id)) is not None:
+                metrics.entities_notified += 1
+        super().async_update_listeners()
+
+    @callback
+    def async_subscribe(self) -> None:
+        """Start receiving shared data for every bus stop."""
+        for bus_stop_id in self.stops:
+            self.hub.async_subscribe(bus_stop_id, self)
+
+    @callback
+    def async_unsubscribe(self) -> None:
+        """Stop receiving shared data for every bus stop."""
+        for bus_stop_id in self.stops:
+            self.hub.async_unsubscribe(bus_stop_id, self)
+            if self.hub.is_subscribed(bus_stop_id):
+                continue
+            # Nothing processes this stop anymore, so its last fetch can go
+            for consumer in (self.history, self.corrector, self.vehicles, self.transitions):
+                if consumer is not None:
+                    consumer.async_forget(bus_stop_id)
+
+    @callback
+    def async_handle_hub_update(self, bus_stop_id: str, buses_info: list[dict]) -> None:
+        """Handle data fetched by another entry for one of the bus stops."""
+        changed = bus_stop_id in self.stale or bus_stop_id in self.failed
+        self.stale.discard(bus_stop_id)
+        self.failed.discard(bus_stop_id)
+        data = dict(self.data or {})
+        routes = self._process_buses(bus_stop_id, buses_info)
+        changed |= routes is not data.get(bus_stop_id)
+        data[bus_stop_id] = routes
+        self._update_interval_from(data, dt_util.now())
+        self._summarize(data, self.failed)
+        if len(self.stops) == 1:
+            # The push covers the whole entry, so the next refresh can wait
+            self.async_set_updated_data(data)
+            return
+
+        # Rescheduling would keep postponing the refresh of the other stops
+        self.data = data
+        if not self.last_update_success:
+            self.last_update_success = True
+            self.last_exception = None
+            changed = True
+        if changed:
+            self.async_update_listeners()
+
+    @callback
+    def async_restore(self, snapshot: dict[str, list[dict] | None]) -> None:
+        """Start from saved records, or no data, without sending a request."""
+        self.data = {
+            bus_stop_id: self._project(bus_stop_id, snapshot.get(bus_stop_id))
+            if snapshot.get(bus_stop_id) is not None
+            else {}
+            for bus_stop_id in self.stops
+        }
+        self._summarize(self.data, self.failed)
+
+    def _summarize(self, data: dict[str, dict[str, RouteArrival]], failed: set[str]) -> None:
+        """Merge the arrivals of the selected routes once per data change."""
+        if not self.aggregate:
+            return
+        source = (data, frozenset(failed))
+        if source == self._summary_source:
+            return
+        self._summary_source = source
+        self.summary = summarize_arrivals(
+            data, self.aggregate_routes, self.aggregate_count, failed
+        )
+
+    def _process_buses(
+        self, bus_stop_id: str, buses_info: list[dict]
+    ) -> dict[str, RouteArrival]:
+        """Project the bus list of a stop into records for its tracked bus numbers."""
+        if buses_info is self._buses_info.get(bus_stop_id) and bus_stop_id in (self.data or {}):
+            # Same payload as last time: keep the records so nothing is notified
+            return self.data[bus_stop_id]
+        self._buses_info[bus_stop_id] = buses_info
+        if self.snapshots is not None:
+            self.snapshots.async_save(
+                self.entry_id, bus_stop_id, buses_info or [], self.stops[bus_stop_id]
+            )
+        if self.history is not None:
+            self.history.async_record(bus_stop_id, buses_info or [], self.stops[bus_stop_id])
+        routes = self._project(bus_stop_id, buses_info)
+        if self.corrector is not None:
+            self.corrector.async_observe(bus_stop_id, buses_info or [], routes, dt_util.now())
+        if self.vehicles is not None:
+            self.vehicles.async_update(bus_stop_id, buses_info or [], routes, dt_util.now())
+        if self.transitions is not None:
+            self.transitions.async_process(
+                bus_stop_id,
+                buses_info or [],
+                routes,
+                self.approach_thresholds,
+                self.approach_stops,
+            )
+        return routes
+
+    def _project(
+        self, bus_stop_id: str, buses_info: list[dict] | None
+    ) -> dict[str, RouteArrival]:
+        """Build the arrival records of a stop and start the countdown from them."""
+        if not buses_info:
+            _LOGGER.debug("정류장 %s 버스 정보가 없습니다.", bus_stop_id)
+        routes = project_buses(buses_info or [], self.stops[bus_stop_id], dt_util.now())
+        self._anchors[bus_stop_id] = [
+            vehicle.arrival_at
+            for route in routes.values()
+            for vehicle in route.vehicles
+            if vehicle.arrival_at is not None
+        ]
+        self._calendars[bus_stop_id] = service_calendar(
+            tuple(route.service_span for route in routes.values())
+        )
+        self._async_schedule_countdown()
+        return routes
+
+    def _closed_stops(
+        self, data: dict[str, dict[str, RouteArrival]], now: datetime
+    ) -> dict[str, float]:
+        """Return the seconds until service of every stop outside its service hours.
+
+        A stop only counts as closed while none of its vehicles is still on
+        the way, so the last buses of the night are followed to the end.
+        """
+        closed = {}
+        for bus_stop_id in self.stops:
+            calendar = self._calendars.get(bus_stop_id)
+            if (
+                calendar is None
+                or not data.get(bus_stop_id)
+                or any(anchor > now for anchor in self._anchors.get(bus_stop_id, ()))
+            ):
+                continue
+            if wait := calendar.seconds_until_service(now):
+                closed[bus_stop_id] = wait
+        return closed
+
+    def _update_interval_from(
+        self, data: dict[str, dict[str, RouteArrival]], now: datetime
+    ) -> None:
+        """Pick the next polling interval from the arrivals and the service hours."""
+        closed = self._closed_stops(data, now)
+        resting = {
+            bus_stop_id: wait
+            for bus_stop_id, wait in closed.items()
+            if wait > SERVICE_START_MARGIN
+        }
+        if resting and len(resting) == len(self.stops):
+            # Nothing runs anywhere: sleep until shortly before the first departure
+            self.update_interval = max(
+                self.base_interval,
+                timedelta(seconds=min(resting.values()) - SERVICE_START_MARGIN),
+            )
+        elif self.adaptive:
+            self.update_interval = next_interval(
+                {
+                    (bus_stop_id, name): route
+                    for bus_stop_id, routes in data.items()
+                    if bus_stop_id not in resting
+                    for name, route in routes.items()
+                },
+                self.min_interval,
+                self.max_interval,
+                min(
+                    (wait for stop, wait in closed.items() if stop not in resting),
+                    default=None,
+                ),
+            )
+        else:
+            self.update_interval = self.base_interval
+        _LOGGER.debug(
+            "정류장 %s 다음 업데이트까지 %s", ", ".join(self.stops), self.update_interval
+        )
+
+    @callback
+    def _async_set_status(self, stale: set[str], failed: set[str]) -> None:
+        """Track stale and failed stops and pace refreshes to the breakers."""
+        if stale and stale == set(self.stops):
+            # No stop is requested before its next probe, so wait until then
+            retry_in = min(self.hub.breaker(bus_stop_id).retry_in() for bus_stop_id in stale)
+            self.update_interval = max(
+                self.base_interval, timedelta(seconds=retry_in + 1)
+            )
+        if stale != self.stale or failed != self.failed:
+            self.stale, self.failed = stale, failed
+            # The data itself may not change, so tell the entities directly
+            self.async_update_listeners()
+
+    def available(self, bus_stop_id: str) -> bool:
+        """Return whether the data of a stop is usable."""
+        return self.last_update_success and bus_stop_id not in self.failed
+
+    def circuit_attributes(self, bus_stop_id: str) -> dict:
+        """Return the circuit breaker state of a stop for entity attributes."""
+        breaker = self.hub.breaker(bus_stop_id)
+        if breaker is None:
+            return {}
+        attrs = {"circuit_state": breaker.state, "stale": bus_stop_id in self.stale}
+        if breaker.state != STATE_CLOSED:
+            attrs["retry_at"] = dt_util.as_local(
+                dt_util.utc_from_timestamp(breaker.retry_time)
+            ).replace(microsecond=0).isoformat()
+        return attrs
+
+    async def _async_update_data(self):
+        """Fetch every stop in service from the shared hub in one batch.
+
+        Stops outside their service hours are not requested until shortly
+        before their first departure and keep their last data, so their
+        entities are not written either.
+        """
+        previous = self.data or {}
+        resting = {
+            bus_stop_id
+            for bus_stop_id, wait in self._closed_stops(previous, dt_util.now()).items()
+            if wait > SERVICE_START_MARGIN
+        }
+        if resting:
+            _LOGGER.debug("정류장 %s 운행 시간이 아니므로 요청하지 않습니다.", ", ".join(resting))
+        results = await self.hub.async_fetch_many(
+            [bus_stop_id for bus_stop_id in self.stops if bus_stop_id not in resting], self
+        )
+        data = {bus_stop_id: previous[bus_stop_id] for bus_stop_id in resting}
+        # A resting stop keeps being served from the data it was stale with
+        stale = self.stale & resting
+        failed = {}
+        for bus_stop_id, result in results.items():
+            if not isinstance(result, Exception):
+                data[bus_stop_id] = self._process_buses(bus_stop_id, result)
+                continue
+            breaker = self.hub.breaker(bus_stop_id)
+            if bus_stop_id in previous and breaker is not None and breaker.state != STATE_CLOSED:
+                # Serve the last good data while the stop is not requested
+                _LOGGER.debug("정류장 %s 이전 데이터 사용: %s", bus_stop_id, result)
+                stale.add(bus_stop_id)
+            else:
+                failed[bus_stop_id] = result
+            data[bus_stop_id] = previous.get(bus_stop_id, {})
+
+        self._update_interval_from(data, dt_util.now())
+        self._summarize(data, set(failed))
+        self._async_set_status(stale, set(failed))
+        if failed and len(failed) == len(self.stops):
+            error = next(iter(failed.values()))
+            if isinstance(error, asyncio.TimeoutError):
+                raise UpdateFailed(f"Timeout error fetching data: {error}")
+            if isinstance(error, aiohttp.ClientError):
+                raise UpdateFailed(f"Error fetching data: {error}")
+            raise UpdateFailed(f"Unexpected error: {error}")
+        return data
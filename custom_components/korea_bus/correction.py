@@ -0,0 +1,218 @@
+"""Learned ETA correction for Korea Bus."""
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+import logging
+import math
+
+import numpy as np
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+from homeassistant.util import dt as dt_util
+
+from .const import (
+    DOMAIN,
+    DATA_CORRECTOR,
+    STORAGE_VERSION,
+    STORAGE_KEY_CORRECTION,
+    KAKAO_TIME_ZONE,
+    HISTORY_TRIP_GAP,
+    HISTORY_ARRIVED_ETA,
+    CORRECTION_MIN_SAMPLES,
+    CORRECTION_MAX_SAMPLES,
+    CORRECTION_MAX_PENDING,
+    CORRECTION_CONFIDENCE_WINDOW,
+    CORRECTION_SAVE_DELAY,
+)
+from .projection import FetchLog, RouteArrival, parse_int
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class RouteErrorModel:
+    """Mean and variance of the ETA error of one route at one stop per hour of day."""
+
+    __slots__ = ("count", "mean", "m2")
+
+    def __init__(self, data: dict | None = None) -> None:
+        """Initialize the model, optionally from saved data."""
+        data = data or {}
+        self.count = np.array(data.get("count", [0.0] * 24), dtype=np.float64)
+        self.mean = np.array(data.get("mean", [0.0] * 24), dtype=np.float64)
+        self.m2 = np.array(data.get("m2", [0.0] * 24), dtype=np.float64)
+
+    def update(self, hours: np.ndarray, errors: np.ndarray) -> None:
+        """Merge a batch of errors into the per-hour statistics.
+
+        Uses the parallel variance merge, so the cost is linear in the batch
+        and constant per observation. The prior count is capped so the model
+        keeps following changes in traffic.
+        """
+        count = np.bincount(hours, minlength=24).astype(np.float64)
+        total = np.bincount(hours, weights=errors, minlength=24)
+        hit = count > 0
+        batch_mean = np.divide(total, count, out=np.zeros(24), where=hit)
+        batch_m2 = np.bincount(hours, weights=(errors - batch_mean[hours]) ** 2, minlength=24)
+
+        prior = np.minimum(self.count, CORRECTION_MAX_SAMPLES)
+        # Scale the spread along with the capped count
+        scale = np.divide(prior, self.count, out=np.ones(24), where=self.count > 0)
+        merged = prior + count
+        delta = batch_mean - self.mean
+        self.mean = np.where(hit, self.mean + delta * np.divide(count, merged, out=np.zeros(24), where=hit), self.mean)
+        self.m2 = np.where(
+            hit,
+            self.m2 * scale + batch_m2 + delta**2 * np.divide(prior * count, merged, out=np.zeros(24), where=hit),
+            self.m2,
+        )
+        self.count = np.where(hit, merged, self.count)
+
+    def estimate(self, hour: int) -> tuple[float, float] | None:
+        """Return the bias and standard deviation for an hour if known well enough."""
+        count = self.count[hour]
+        if count < CORRECTION_MIN_SAMPLES:
+            return None
+        return float(self.mean[hour]), math.sqrt(self.m2[hour] / (count - 1))
+
+    def as_dict(self) -> dict:
+        """Return the model for storage."""
+        return {
+            "count": self.count.tolist(),
+            "mean": self.mean.tolist(),
+            "m2": self.m2.tolist(),
+        }
+
+
+class EtaCorrector:
+    """Learn how far Kakao's arrival times are off and correct them.
+
+    Every prediction of a vehicle is kept until the vehicle reaches the
+    stop, seen as ``busStopCount`` reaching zero or the vehicle disappearing
+    right after an imminent ETA. The errors of that trip then update the
+    model of the route at that stop for the hour each prediction was made.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize the corrector."""
+        self._store = Store(hass, STORAGE_VERSION, STORAGE_KEY_CORRECTION)
+        self._models: dict[str, RouteErrorModel] = {}
+        # (stop, route) -> vehicle -> [(hour, predicted epoch), ...], last ETA, last seen
+        self._pending: dict[tuple[str, str], dict[str, list]] = {}
+        self._fetches = FetchLog()
+
+    async def async_load(self) -> None:
+        """Load the models from storage."""
+        if (data := await self._store.async_load()) is None:
+            return
+        self._models = {
+            key: RouteErrorModel(model) for key, model in data.get("models", {}).items()
+        }
+
+    @callback
+    def _data_to_save(self) -> dict:
+        return {"models": {key: model.as_dict() for key, model in self._models.items()}}
+
+    @callback
+    def async_observe(
+        self,
+        bus_stop_id: str,
+        buses_info: list[dict],
+        routes: dict[str, RouteArrival],
+        now: datetime,
+    ) -> None:
+        """Track the predictions of a fetch and learn from completed trips."""
+        hour = _hour(now)
+        timestamp = now.timestamp()
+        learned = False
+        for name, route in routes.items():
+            key = (bus_stop_id, name)
+            # Entries sharing a stop see the same fetch; count it once
+            if not self._fetches.first(bus_stop_id, name, buses_info):
+                continue
+            pending = self._pending.setdefault(key, {})
+
+            present = set()
+            for vehicle in route.vehicles:
+                if not vehicle.vehicle_number or vehicle.arrival_at is None:
+                    continue
+                present.add(vehicle.vehicle_number)
+                trip = pending.setdefault(vehicle.vehicle_number, [[], None, None])
+                trip[0].append((hour, vehicle.arrival_at.timestamp()))
+                del trip[0][:-CORRECTION_MAX_PENDING]
+                trip[1], trip[2] = vehicle.arrival_time, timestamp
+                if parse_int(vehicle.bus_stop_count) == 0:
+                    # At the stop now: every earlier prediction can be scored
+                    learned |= self._learn(key, trip[0][:-1], timestamp)
+                    del pending[vehicle.vehicle_number]
+
+            for vehicle_number in list(pending):
+                if vehicle_number in present:
+                    continue
+                predictions, last_eta, last_seen = pending.pop(vehicle_number)
+                if (
+                    last_eta is not None
+                    and last_eta <= HISTORY_ARRIVED_ETA
+                    and timestamp - last_seen <= HISTORY_TRIP_GAP
+                ):
+                    # Gone right after an imminent ETA: take the last prediction as actual
+                    learned |= self._learn(key, predictions[:-1], predictions[-1][1])
+
+        if learned:
+            self._store.async_delay_save(self._data_to_save, CORRECTION_SAVE_DELAY)
+
+    @callback
+    def async_forget(self, bus_stop_id: str) -> None:
+        """Forget the last fetch and open trips of a stop nobody subscribes to anymore."""
+        self._fetches.forget(bus_stop_id)
+        # A later arrival at the stop would be unrelated to these predictions
+        for key in [key for key in self._pending if key[0] == bus_stop_id]:
+            del self._pending[key]
+
+    def _learn(self, key: tuple[str, str], predictions: list, actual: float) -> bool:
+        if not predictions:
+            return False
+        hours = np.fromiter((hour for hour, _ in predictions), dtype=np.int64)
+        errors = actual - np.fromiter((predicted for _, predicted in predictions), dtype=np.float64)
+        model_key = f"{key[0]}:{key[1]}"
+        if model_key not in self._models:
+            self._models[model_key] = RouteErrorModel()
+        self._models[model_key].update(hours, errors)
+        _LOGGER.debug("정류장 %s %s번 도착 오차 %s건 학습", key[0], key[1], len(errors))
+        return True
+
+    def correct(
+        self, bus_stop_id: str, bus_number: str, arrival_at: datetime | None, now: datetime
+    ) -> tuple[datetime, float] | None:
+        """Return the corrected arrival time and the confidence it holds within a minute."""
+        if arrival_at is None:
+            return None
+        model = self._models.get(f"{bus_stop_id}:{bus_number}")
+        if model is None or (estimate := model.estimate(_hour(now))) is None:
+            return None
+        bias, deviation = estimate
+        confidence = (
+            math.erf(CORRECTION_CONFIDENCE_WINDOW / (deviation * math.sqrt(2)))
+            if deviation > 0
+            else 1.0
+        )
+        return arrival_at + timedelta(seconds=bias), round(confidence, 2)
+
+
+def _hour(now: datetime) -> int:
+    return now.astimezone(dt_util.get_time_zone(KAKAO_TIME_ZONE)).hour
+
+
+async def async_get_corrector(hass: HomeAssistant) -> EtaCorrector:
+    """Return the shared ETA corrector, loading it on first use."""
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    if DATA_CORRECTOR not in domain_data:
+        # Registered before loading so entries set up concurrently share one corrector
+        domain_data[DATA_CORRECTOR] = hass.async_create_task(_async_load_corrector(hass))
+    return await domain_data[DATA_CORRECTOR]
+
+
+async def _async_load_corrector(hass: HomeAssistant) -> EtaCorrector:
+    corrector = EtaCorrector(hass)
+    await corrector.async_load()
+    return corrector
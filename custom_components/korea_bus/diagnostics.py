@@ -0,0 +1,55 @@
+"""Diagnostics support for Korea Bus."""
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from .const import DOMAIN
+from .parse_stage import get_parse_stage
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> dict[str, Any]:
+    """Return diagnostics for a config entry."""
+    coordinator = hass.data[DOMAIN][entry.entry_id]
+    parse_stage = get_parse_stage(hass)
+    return {
+        "entry": {
+            "data": dict(entry.data),
+            "options": dict(entry.options),
+        },
+        "coordinator": {
+            "last_update_success": coordinator.last_update_success,
+            "update_interval": coordinator.update_interval.total_seconds(),
+            "listeners": coordinator.listener_count,
+        },
+        "stops": {
+            bus_stop_id: _stop_diagnostics(coordinator, bus_stop_id)
+            for bus_stop_id in coordinator.stops
+        },
+        "parse": {
+            kind: {
+                "count": timing.count,
+                "bytes": timing.bytes,
+                "mean_ms": round(timing.total / timing.count * 1000, 3) if timing.count else None,
+                "max_ms": round(timing.max * 1000, 3),
+            }
+            for kind, timing in parse_stage.timings.items()
+        },
+    }
+
+
+def _stop_diagnostics(coordinator, bus_stop_id: str) -> dict[str, Any]:
+    """Return the diagnostics of one bus stop of the coordinator."""
+    metrics = coordinator.hub.metrics(bus_stop_id)
+    breaker = coordinator.hub.breaker(bus_stop_id)
+    return {
+        "tracked_routes": sorted((coordinator.data or {}).get(bus_stop_id, {})),
+        "stale": bus_stop_id in coordinator.stale,
+        "failed": bus_stop_id in coordinator.failed,
+        "metrics": metrics.as_dict() if metrics is not None else None,
+        "breaker": breaker.as_dict() if breaker is not None else None,
+    }
@@ -0,0 +1,42 @@
+"""Arrival time anchoring for Korea Bus."""
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+
+from homeassistant.util import dt as dt_util
+
+from .const import KAKAO_TIME_ZONE, MAX_COLLECT_AGE
+
+COLLECT_DATETIME_FORMAT = "%Y%m%d%H%M%S"
+
+
+def parse_collect_datetime(value) -> datetime | None:
+    """Parse a Kakao ``collectDateTime`` value into an aware datetime."""
+    if not value:
+        return None
+    try:
+        collected = datetime.strptime(str(value), COLLECT_DATETIME_FORMAT)
+    except ValueError:
+        return None
+    return collected.replace(tzinfo=dt_util.get_time_zone(KAKAO_TIME_ZONE))
+
+
+def arrival_anchor(arrival_time, collect_datetime, now: datetime) -> datetime | None:
+    """Return the absolute arrival time for an ETA reported at collect time.
+
+    Falls back to ``now`` as the reference when ``collectDateTime`` is
+    missing, in the future or too old to be trusted.
+    """
+    try:
+        seconds = int(arrival_time)
+    except (ValueError, TypeError):
+        return None
+    if seconds <= 0:
+        return None
+
+    reference = parse_collect_datetime(collect_datetime)
+    if reference is None or not (
+        now - timedelta(seconds=MAX_COLLECT_AGE) <= reference <= now
+    ):
+        reference = now
+    return reference + timedelta(seconds=seconds)
@@ -0,0 +1,100 @@
+"""Batched fetch engine for Korea Bus."""
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+
+import aiohttp
+from yarl import URL
+
+from .const import BASE_URL
+from .kakao import KakaoBusAPI
+from .metrics import StopMetrics
+from .parse_stage import ParseStage
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class HostRateLimiter:
+    """Space requests to a single host evenly."""
+
+    def __init__(self, rate: float) -> None:
+        """Initialize the limiter with the allowed requests per second."""
+        self._spacing = 1 / rate if rate > 0 else 0
+        self._next_slot = 0.0
+
+    async def async_acquire(self) -> None:
+        """Wait until the next request slot."""
+        if not self._spacing:
+            return
+        now = time.monotonic()
+        slot = max(now, self._next_slot)
+        self._next_slot = slot + self._spacing
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+
+class BusFetchEngine:
+    """Fetch many bus stops concurrently over one shared session.
+
+    Requests run concurrently up to ``max_in_flight`` and are spaced per
+    host by ``rate_limit`` requests per second. One ``KakaoBusAPI`` is kept
+    per stop so per-stop client state survives between batches.
+    """
+
+    def __init__(
+        self,
+        session: aiohttp.ClientSession,
+        max_in_flight: int,
+        rate_limit: float,
+        parse_stage: ParseStage | None = None,
+    ) -> None:
+        """Initialize the engine."""
+        self.session = session
+        self.parse_stage = parse_stage
+        self._semaphore = asyncio.Semaphore(max_in_flight)
+        self._rate_limit = rate_limit
+        self._limiters: dict[str, HostRateLimiter] = {}
+        self._apis: dict[str, KakaoBusAPI] = {}
+
+    def forget(self, bus_stop_id: str) -> None:
+        """Drop the client state kept for a stop."""
+        self._apis.pop(bus_stop_id, None)
+
+    def _api(self, bus_stop_id: str) -> KakaoBusAPI:
+        if bus_stop_id not in self._apis:
+            self._apis[bus_stop_id] = KakaoBusAPI(
+                self.session, bus_stop_id, [], self.parse_stage
+            )
+        return self._apis[bus_stop_id]
+
+    def _limiter(self, url: str) -> HostRateLimiter:
+        host = URL(url).host
+        if host not in self._limiters:
+            self._limiters[host] = HostRateLimiter(self._rate_limit)
+        return self._limiters[host]
+
+    async def _async_fetch_one(
+        self, bus_stop_id: str, metrics: StopMetrics | None
+    ) -> list[dict]:
+        async with self._semaphore:
+            await self._limiter(BASE_URL).async_acquire()
+            return await self._api(bus_stop_id).fetch_buses(metrics)
+
+    async def async_fetch_many(
+        self,
+        bus_stop_ids: list[str],
+        metrics: dict[str, StopMetrics] | None = None,
+    ) -> dict[str, list[dict] | Exception]:
+        """Fetch every stop and return its bus list or the error it raised."""
+        metrics = metrics or {}
+        results = await asyncio.gather(
+            *(
+                self._async_fetch_one(bus_stop_id, metrics.get(bus_stop_id))
+                for bus_stop_id in bus_stop_ids
+            ),
+            return_exceptions=True,
+        )
+        _LOGGER.debug("정류장 %s곳 일괄 조회 완료", len(bus_stop_ids))
+        return dict(zip(bus_stop_ids, results))
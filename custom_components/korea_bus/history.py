@@ -0,0 +1,399 @@
+"""Columnar arrival history for Korea Bus."""
+from __future__ import annotations
+
+import asyncio
+from datetime import datetime, timedelta
+import logging
+from pathlib import Path
+import time
+
+import numpy as np
+
+from homeassistant.const import EVENT_HOMEASSISTANT_STOP
+from homeassistant.core import CALLBACK_TYPE, Event, HomeAssistant, callback
+from homeassistant.helpers.event import async_track_time_interval
+from homeassistant.helpers.json import save_json
+from homeassistant.helpers.storage import STORAGE_DIR
+from homeassistant.util import dt as dt_util
+from homeassistant.util.json import load_json
+
+from .const import (
+    DOMAIN,
+    DATA_CONFIG,
+    DATA_HISTORY,
+    CONF_HISTORY_RETENTION,
+    DEFAULT_HISTORY_RETENTION,
+    KAKAO_TIME_ZONE,
+    MAX_COLLECT_AGE,
+    HISTORY_FLUSH_INTERVAL,
+    HISTORY_SEGMENT_ROWS,
+    HISTORY_SEGMENT_SPAN,
+    HISTORY_TRIP_GAP,
+    HISTORY_ARRIVED_ETA,
+    HISTORY_MAX_HEADWAY,
+)
+from .eta import parse_collect_datetime
+from .projection import VEHICLE_FIELDS, FetchLog, parse_int
+
+_LOGGER = logging.getLogger(__name__)
+
+# One row per approaching vehicle per refresh; strings are dictionary codes
+OBSERVATION_DTYPE = np.dtype([
+    ("observed", "<u4"),
+    ("collected", "<u4"),
+    ("stop", "<u4"),
+    ("route", "<u4"),
+    ("vehicle", "<u4"),
+    ("arrival_time", "<i4"),
+    ("bus_stop_count", "<i2"),
+    ("remain_seat", "<i2"),
+])
+
+INDEX_FILE = "index.json"
+
+
+class HistoryLog:
+    """Append-only log of vehicle observations in memory-mapped segments.
+
+    Rows are buffered on the event loop and written to fixed-size ``.npy``
+    segments in the executor. A new segment is started when the current one
+    is full or spans more than a day, and segments older than the retention
+    are deleted. Stop, route and vehicle strings are stored as codes into a
+    shared dictionary kept in the index file.
+    """
+
+    def __init__(self, hass: HomeAssistant, path: Path, retention_days: int) -> None:
+        """Initialize the log."""
+        self.hass = hass
+        self.path = path
+        self.retention = retention_days * 86400
+        self._strings: list[str] = []
+        self._codes: dict[str, int] = {}
+        self._segments: list[dict] = []
+        self._buffer: list[tuple] = []
+        self._current: np.memmap | None = None
+        self._lock = asyncio.Lock()
+        self._fetches = FetchLog()
+        self._unsub_flush: CALLBACK_TYPE | None = None
+        self._unsub_stop: CALLBACK_TYPE | None = None
+
+    def load(self) -> None:
+        """Load the index; runs in the executor."""
+        self.path.mkdir(parents=True, exist_ok=True)
+        index = load_json(self.path / INDEX_FILE, default={})
+        self._strings = index.get("strings", [])
+        self._codes = {value: code for code, value in enumerate(self._strings)}
+        self._segments = [
+            segment
+            for segment in index.get("segments", [])
+            if (self.path / segment["file"]).exists()
+        ]
+
+    def _code(self, value) -> int:
+        value = "" if value is None else str(value)
+        if (code := self._codes.get(value)) is None:
+            code = self._codes[value] = len(self._strings)
+            self._strings.append(value)
+        return code
+
+    @callback
+    def async_record(
+        self, bus_stop_id: str, buses_info: list[dict], bus_numbers: list[str]
+    ) -> None:
+        """Buffer an observation of every approaching vehicle of the tracked routes."""
+        observed = int(time.time())
+        wanted = set(bus_numbers)
+        stop = self._code(bus_stop_id)
+        for bus in buses_info:
+            # Entries sharing a stop see the same fetch; record it once
+            if bus.get("name") not in wanted or not self._fetches.first(
+                bus_stop_id, bus.get("name"), buses_info
+            ):
+                continue
+            route = self._code(bus.get("name"))
+            for fields in VEHICLE_FIELDS:
+                arrival_time = parse_int(bus.get(fields["arrival_time"]))
+                vehicle_number = bus.get(fields["vehicle_number"])
+                if arrival_time is None or arrival_time <= 0 or not vehicle_number:
+                    continue
+                collected = parse_collect_datetime(bus.get(fields["updated_at"]))
+                self._buffer.append((
+                    observed,
+                    int(collected.timestamp()) if collected else 0,
+                    stop,
+                    route,
+                    self._code(vehicle_number),
+                    arrival_time,
+                    _clip16(parse_int(bus.get(fields["bus_stop_count"]), -1)),
+                    _clip16(parse_int(bus.get(fields["remain_seat"]), -1)),
+                ))
+
+    @callback
+    def async_forget(self, bus_stop_id: str) -> None:
+        """Forget the last fetch of a stop nobody subscribes to anymore."""
+        self._fetches.forget(bus_stop_id)
+
+    @callback
+    def async_start(self) -> None:
+        """Flush the log periodically and when Home Assistant stops."""
+
+        async def async_close_on_stop(_event: Event) -> None:
+            # A fired listener must not be removed again
+            self._unsub_stop = None
+            await self.async_close()
+
+        self._unsub_flush = async_track_time_interval(
+            self.hass, self.async_flush, timedelta(seconds=HISTORY_FLUSH_INTERVAL)
+        )
+        self._unsub_stop = self.hass.bus.async_listen_once(
+            EVENT_HOMEASSISTANT_STOP, async_close_on_stop
+        )
+
+    async def async_close(self) -> None:
+        """Stop the periodic flush and write the remaining rows."""
+        if self._unsub_flush is not None:
+            self._unsub_flush()
+            self._unsub_flush = None
+        if self._unsub_stop is not None:
+            self._unsub_stop()
+            self._unsub_stop = None
+        await self.async_flush()
+
+    async def async_flush(self, _now: datetime | None = None) -> None:
+        """Write the buffered rows to the current segment."""
+        if not self._buffer:
+            return
+        async with self._lock:
+            rows, self._buffer = self._buffer, []
+            await self.hass.async_add_executor_job(
+                self._write, rows, list(self._strings)
+            )
+
+    def _write(self, rows: list[tuple], strings: list[str]) -> None:
+        """Append rows, rotate and expire segments; runs in the executor."""
+        if not rows:
+            return
+        observations = np.array(rows, dtype=OBSERVATION_DTYPE)
+        while len(observations):
+            segment = self._writable_segment(int(observations["observed"][0]))
+            count = min(HISTORY_SEGMENT_ROWS - segment["rows"], len(observations))
+            self._current[segment["rows"]:segment["rows"] + count] = observations[:count]
+            segment["rows"] += count
+            segment["end"] = int(observations["observed"][count - 1])
+            observations = observations[count:]
+        if self._current is not None:
+            self._current.flush()
+        self._expire(time.time())
+        save_json(
+            str(self.path / INDEX_FILE),
+            {"strings": strings, "segments": self._segments},
+        )
+
+    def _writable_segment(self, observed: int) -> dict:
+        """Return the segment to append to, starting a new one when needed."""
+        if self._segments:
+            segment = self._segments[-1]
+            if (
+                segment["rows"] < HISTORY_SEGMENT_ROWS
+                and observed - segment["start"] < HISTORY_SEGMENT_SPAN
+            ):
+                if self._current is None:
+                    self._current = np.lib.format.open_memmap(
+                        self.path / segment["file"], mode="r+"
+                    )
+                return segment
+
+        segment = {"file": f"segment-{observed}.npy", "start": observed, "end": observed, "rows": 0}
+        self._current = np.lib.format.open_memmap(
+            self.path / segment["file"],
+            mode="w+",
+            dtype=OBSERVATION_DTYPE,
+            shape=(HISTORY_SEGMENT_ROWS,),
+        )
+        self._segments.append(segment)
+        _LOGGER.debug("기록 세그먼트 생성: %s", segment["file"])
+        return segment
+
+    def _expire(self, now: float) -> None:
+        """Delete segments older than the retention."""
+        while len(self._segments) > 1 and self._segments[0]["end"] < now - self.retention:
+            segment = self._segments.pop(0)
+            (self.path / segment["file"]).unlink(missing_ok=True)
+            _LOGGER.debug("기록 세그먼트 삭제: %s", segment["file"])
+
+    def read(self, since: float) -> np.ndarray:
+        """Return the observations since a time; runs in the executor."""
+        parts = [
+            np.load(self.path / segment["file"], mmap_mode="r")[: segment["rows"]]
+            for segment in self._segments
+            if segment["end"] >= since and segment["rows"]
+        ]
+        if not parts:
+            return np.empty(0, dtype=OBSERVATION_DTYPE)
+        observations = np.concatenate(parts)
+        return observations[observations["observed"] >= since]
+
+    async def async_statistics(
+        self, days: int, bus_stop_id: str | None = None, bus_number: str | None = None
+    ) -> dict:
+        """Return headway and ETA error statistics per route and hour of day."""
+        stop = self._codes.get(bus_stop_id) if bus_stop_id else None
+        route = self._codes.get(bus_number) if bus_number else None
+        if (bus_stop_id and stop is None) or (bus_number and route is None):
+            return {}
+        rows, self._buffer = self._buffer, []
+        strings = list(self._strings)
+
+        def compute() -> dict:
+            self._write(rows, strings)
+            observations = self.read(time.time() - days * 86400)
+            if stop is not None:
+                observations = observations[observations["stop"] == stop]
+            if route is not None:
+                observations = observations[observations["route"] == route]
+            return compute_statistics(observations, strings)
+
+        # Segments are only touched by one executor job at a time
+        async with self._lock:
+            return await self.hass.async_add_executor_job(compute)
+
+
+def compute_statistics(observations: np.ndarray, strings: list[str]) -> dict:
+    """Compute headways and ETA errors per stop, route and hour of day.
+
+    Observations of one vehicle on one route at one stop without a long gap
+    form a trip. A trip counts as arrived when its last ETA was imminent and
+    the stop was observed again without the vehicle; the last predicted
+    arrival is then taken as the actual arrival time.
+    """
+    if not len(observations):
+        return {}
+    obs = observations[
+        np.lexsort((
+            observations["observed"],
+            observations["vehicle"],
+            observations["route"],
+            observations["stop"],
+        ))
+    ]
+    observed = obs["observed"].astype(np.int64)
+    collected = obs["collected"].astype(np.int64)
+    # Anchor each ETA to collectDateTime when it is plausible, as the sensors do
+    anchored = (collected > 0) & (collected <= observed) & (observed - collected <= MAX_COLLECT_AGE)
+    predicted = np.where(anchored, collected, observed) + obs["arrival_time"]
+
+    same_route = (np.diff(obs["stop"]) == 0) & (np.diff(obs["route"]) == 0)
+    same_trip = same_route & (np.diff(obs["vehicle"]) == 0) & (np.diff(observed) <= HISTORY_TRIP_GAP)
+    starts = np.r_[0, np.flatnonzero(~same_trip) + 1]
+    ends = np.r_[starts[1:], len(obs)] - 1
+
+    # Latest observation of each stop and route, to tell if a vehicle disappeared
+    route_starts = np.r_[0, np.flatnonzero(~same_route) + 1]
+    route_latest = np.maximum.reduceat(observed, route_starts)
+    route_of_row = np.repeat(np.arange(len(route_starts)), np.diff(np.r_[route_starts, len(obs)]))
+
+    arrived = (
+        (obs["arrival_time"][ends] <= HISTORY_ARRIVED_ETA) | (obs["bus_stop_count"][ends] == 0)
+    ) & (observed[ends] < route_latest[route_of_row[ends]])
+    actual = predicted[ends]
+
+    offset = dt_util.get_time_zone(KAKAO_TIME_ZONE).utcoffset(datetime.now()).total_seconds()
+    result: dict[str, dict] = {}
+
+    # ETA error of every observation of an arrived trip, by hour of observation
+    trip_of_row = np.repeat(np.arange(len(starts)), ends - starts + 1)
+    rows = arrived[trip_of_row] & (np.arange(len(obs)) != ends[trip_of_row])
+    errors = (actual[trip_of_row] - predicted)[rows]
+    _group_stats(
+        result,
+        "eta_error",
+        obs["stop"][rows],
+        obs["route"][rows],
+        _hours(observed[rows], offset),
+        errors,
+        strings,
+    )
+
+    # Headways between consecutive arrivals of a route, by hour of arrival
+    trip_stop = obs["stop"][ends][arrived]
+    trip_route = obs["route"][ends][arrived]
+    arrivals = actual[arrived]
+    order = np.lexsort((arrivals, trip_route, trip_stop))
+    trip_stop, trip_route, arrivals = trip_stop[order], trip_route[order], arrivals[order]
+    headways = np.diff(arrivals)
+    valid = (np.diff(trip_stop) == 0) & (np.diff(trip_route) == 0) & (headways > 0) & (
+        headways <= HISTORY_MAX_HEADWAY
+    )
+    _group_stats(
+        result,
+        "headway",
+        trip_stop[1:][valid],
+        trip_route[1:][valid],
+        _hours(arrivals[1:][valid], offset),
+        headways[valid],
+        strings,
+    )
+    return result
+
+
+def _hours(timestamps: np.ndarray, offset: float) -> np.ndarray:
+    return ((timestamps + int(offset)) // 3600) % 24
+
+
+def _group_stats(
+    result: dict,
+    name: str,
+    stops: np.ndarray,
+    routes: np.ndarray,
+    hours: np.ndarray,
+    values: np.ndarray,
+    strings: list[str],
+) -> None:
+    """Add count, mean, mean absolute value and percentiles per group."""
+    if not len(values):
+        return
+    keys, inverse = np.unique(np.column_stack((stops, routes, hours)), axis=0, return_inverse=True)
+    inverse = inverse.ravel()
+    counts = np.bincount(inverse)
+    means = np.bincount(inverse, weights=values) / counts
+    absolute = np.bincount(inverse, weights=np.abs(values)) / counts
+    order = np.argsort(inverse, kind="stable")
+    bounds = np.r_[0, np.cumsum(counts)]
+    for group, (stop, route, hour) in enumerate(keys):
+        grouped = values[order[bounds[group]:bounds[group + 1]]]
+        median, p90 = np.percentile(grouped, (50, 90))
+        result.setdefault(f"{strings[stop]}:{strings[route]}", {}).setdefault(name, {})[
+            f"{int(hour):02d}"
+        ] = {
+            "count": int(counts[group]),
+            "mean": round(float(means[group]), 1),
+            "mean_abs": round(float(absolute[group]), 1),
+            "median": round(float(median), 1),
+            "p90": round(float(p90), 1),
+        }
+
+
+def _clip16(value: int) -> int:
+    return max(-32768, min(32767, value))
+
+
+async def async_get_history(hass: HomeAssistant) -> HistoryLog:
+    """Return the shared history log, loading it on first use."""
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    if DATA_HISTORY not in domain_data:
+        # Registered before loading so entries set up concurrently share one
+        # log; two would write the same index and segment files
+        domain_data[DATA_HISTORY] = hass.async_create_task(_async_load_history(hass))
+    return await domain_data[DATA_HISTORY]
+
+
+async def _async_load_history(hass: HomeAssistant) -> HistoryLog:
+    conf = hass.data[DOMAIN].get(DATA_CONFIG, {})
+    history = HistoryLog(
+        hass,
+        Path(hass.config.path(STORAGE_DIR, f"{DOMAIN}_history")),
+        conf.get(CONF_HISTORY_RETENTION, DEFAULT_HISTORY_RETENTION),
+    )
+    await hass.async_add_executor_job(history.load)
+    history.async_start()
+    return history
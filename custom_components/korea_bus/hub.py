@@ -0,0 +1,235 @@
+"""Shared per-stop polling hub for Korea Bus."""
+from __future__ import annotations
+
+import asyncio
+from functools import partial
+import logging
+import time
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.event import async_call_later
+
+from .breaker import STATE_OPEN, CircuitBreaker, CircuitOpenError
+from .const import FETCH_BATCH_WINDOW, HUB_CACHE_TTL, LOOKUP_CACHE_TTL
+from .fetcher import BusFetchEngine
+from .metrics import StopMetrics
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class StopState:
+    """Polling state shared by every subscriber of a bus stop."""
+
+    def __init__(self) -> None:
+        """Initialize the stop state."""
+        self.subscribers: set = set()
+        self.waiters: set = set()
+        self.buses: list[dict] | None = None
+        self.updated: float = 0.0
+        self.future: asyncio.Future | None = None
+        self.metrics = StopMetrics()
+        self.breaker = CircuitBreaker()
+
+
+class KoreaBusHub:
+    """Deduplicate Kakao fetches across config entries sharing a bus stop.
+
+    Coordinators subscribe to the stops they track. Stops requested within
+    the same short batch window are fetched together by the fetch engine,
+    with a single request per stop, and the parsed ``busesList`` is pushed
+    to every other subscriber of that stop.
+    """
+
+    def __init__(self, hass: HomeAssistant, engine: BusFetchEngine) -> None:
+        """Initialize the hub."""
+        self.hass = hass
+        self.engine = engine
+        self._stops: dict[str, StopState] = {}
+        self._pending: list[str] = []
+        self._flush_task: asyncio.Task | None = None
+
+    @callback
+    def async_subscribe(self, bus_stop_id: str, subscriber) -> None:
+        """Register a coordinator for a bus stop."""
+        state = self._stops.setdefault(bus_stop_id, StopState())
+        state.subscribers.add(subscriber)
+        _LOGGER.debug(
+            "정류장 %s 구독자 수: %s", bus_stop_id, len(state.subscribers)
+        )
+
+    @callback
+    def async_unsubscribe(self, bus_stop_id: str, subscriber) -> None:
+        """Release a coordinator and drop the stop when nobody uses it."""
+        state = self._stops.get(bus_stop_id)
+        if state is None:
+            return
+        state.subscribers.discard(subscriber)
+        if state.subscribers:
+            return
+        if state.waiters - {subscriber}:
+            # A lookup still awaits the fetch; drop the stop once it aged out
+            async_call_later(
+                self.hass, LOOKUP_CACHE_TTL, partial(self._async_expire_lookup, bus_stop_id)
+            )
+        else:
+            self._stops.pop(bus_stop_id)
+            self.engine.forget(bus_stop_id)
+            if state.future is not None and not state.future.done():
+                state.future.cancel()
+
+    def is_subscribed(self, bus_stop_id: str) -> bool:
+        """Return whether any coordinator still subscribes to a stop."""
+        state = self._stops.get(bus_stop_id)
+        return state is not None and bool(state.subscribers)
+
+    def metrics(self, bus_stop_id: str) -> StopMetrics | None:
+        """Return the request metrics of a subscribed stop."""
+        state = self._stops.get(bus_stop_id)
+        return state.metrics if state is not None else None
+
+    def breaker(self, bus_stop_id: str) -> CircuitBreaker | None:
+        """Return the circuit breaker of a subscribed stop."""
+        state = self._stops.get(bus_stop_id)
+        return state.breaker if state is not None else None
+
+    async def async_lookup(
+        self, bus_stop_ids: list[str], max_age: float
+    ) -> dict[str, list[dict] | Exception]:
+        """Return the bus lists of any stops, fetching only those older than max_age.
+
+        Stops nobody subscribes to are held without subscribers for a while,
+        so repeated lookups are answered from the cache and concurrent ones
+        share a batch. Fresh data of a subscribed stop is pushed to its
+        subscribers as usual.
+        """
+        now = time.monotonic()
+        results = {}
+        stale = []
+        for bus_stop_id in dict.fromkeys(bus_stop_ids):
+            state = self._stops.get(bus_stop_id)
+            if state is None:
+                state = self._stops[bus_stop_id] = StopState()
+                async_call_later(
+                    self.hass, LOOKUP_CACHE_TTL, partial(self._async_expire_lookup, bus_stop_id)
+                )
+            if state.buses is not None and now - state.updated <= max_age:
+                state.metrics.cache_hits += 1
+                results[bus_stop_id] = state.buses
+            else:
+                stale.append(bus_stop_id)
+        if stale:
+            results.update(await self.async_fetch_many(stale, object()))
+        return results
+
+    @callback
+    def _async_expire_lookup(self, bus_stop_id: str, _now=None) -> None:
+        """Drop a looked up stop once nobody subscribed to it and it aged out."""
+        state = self._stops.get(bus_stop_id)
+        if state is None or state.subscribers:
+            return
+        if state.future is not None or time.monotonic() - state.updated < LOOKUP_CACHE_TTL:
+            async_call_later(
+                self.hass, LOOKUP_CACHE_TTL, partial(self._async_expire_lookup, bus_stop_id)
+            )
+            return
+        self._stops.pop(bus_stop_id)
+        self.engine.forget(bus_stop_id)
+
+    async def async_fetch(self, bus_stop_id: str, requester) -> list[dict]:
+        """Return the bus list for a stop, sharing in-flight and recent fetches."""
+        result = (await self.async_fetch_many([bus_stop_id], requester))[bus_stop_id]
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    async def async_fetch_many(
+        self, bus_stop_ids: list[str], requester
+    ) -> dict[str, list[dict] | Exception]:
+        """Return the bus list or the fetch error of every requested stop."""
+        futures = {}
+        results = {}
+        now = time.monotonic()
+        for bus_stop_id in bus_stop_ids:
+            state = self._stops.get(bus_stop_id)
+            if state is None:
+                results[bus_stop_id] = KeyError(f"구독되지 않은 정류장입니다: {bus_stop_id}")
+                continue
+            if state.buses is not None and now - state.updated < HUB_CACHE_TTL:
+                state.metrics.cache_hits += 1
+                results[bus_stop_id] = state.buses
+                continue
+            if state.future is None:
+                if not state.breaker.allow_request():
+                    results[bus_stop_id] = CircuitOpenError(
+                        f"정류장 {bus_stop_id} 요청 중단 중, "
+                        f"{state.breaker.retry_in():.0f}초 후 재시도"
+                    )
+                    continue
+                state.future = self.hass.loop.create_future()
+                self._pending.append(bus_stop_id)
+            state.waiters.add(requester)
+            futures[bus_stop_id] = state.future
+
+        if futures and self._flush_task is None:
+            self._flush_task = self.hass.async_create_task(self._async_flush())
+
+        try:
+            for bus_stop_id, future in futures.items():
+                try:
+                    results[bus_stop_id] = await asyncio.shield(future)
+                except asyncio.CancelledError:
+                    raise
+                except Exception as error:
+                    results[bus_stop_id] = error
+        finally:
+            for bus_stop_id in futures:
+                if (state := self._stops.get(bus_stop_id)) is not None:
+                    state.waiters.discard(requester)
+        return results
+
+    async def _async_flush(self) -> None:
+        """Fetch every pending stop in one batch and fan the results out."""
+        await asyncio.sleep(FETCH_BATCH_WINDOW)
+        self._flush_task = None
+        bus_stop_ids, self._pending = self._pending, []
+
+        results = await self.engine.async_fetch_many(
+            bus_stop_ids,
+            {
+                bus_stop_id: self._stops[bus_stop_id].metrics
+                for bus_stop_id in bus_stop_ids
+                if bus_stop_id in self._stops
+            },
+        )
+        for bus_stop_id, result in results.items():
+            state = self._stops.get(bus_stop_id)
+            if state is None or state.future is None:
+                continue
+            future, state.future = state.future, None
+            if isinstance(result, asyncio.CancelledError):
+                future.cancel()
+                continue
+            if isinstance(result, BaseException):
+                state.metrics.record_failure(result)
+                state.breaker.record_failure()
+                if state.breaker.state == STATE_OPEN:
+                    _LOGGER.warning(
+                        "정류장 %s 조회 %s회 연속 실패, %.0f초 후 재시도합니다",
+                        bus_stop_id,
+                        state.breaker.failures,
+                        state.breaker.retry_in(),
+                    )
+                future.set_exception(result)
+                # Mark the error retrieved in case every waiter went away
+                future.exception()
+                continue
+
+            state.breaker.record_success()
+            unchanged = result is state.buses
+            state.buses = result
+            state.updated = time.monotonic()
+            future.set_result(result)
+            if unchanged:
+                continue
+            for subscriber in state.subscribers - state.waiters:
+                subscriber.async_handle_hub_update(bus_stop_id, result)
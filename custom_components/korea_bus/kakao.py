@@ -1,10 +1,16 @@
 """Kakao Map API 연동을 위한 클래스."""
+from __future__ import annotations
+
 import aiohttp
-import async_timeout
 import asyncio
+import hashlib
+import json
 import logging
+import time
 
 from .const import BASE_URL
+from .metrics import StopMetrics
+from .parse_stage import ParseStage
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -12,23 +18,73 @@ _LOGGER = logging.getLogger(__name__)
 class KakaoBusAPI:
     """Class to communicate with Kakao Map API."""
 
-    def __init__(self, session: aiohttp.ClientSession, bus_stop_id: str, bus_numbers: list[str]):
+    def __init__(
+        self,
+        session: aiohttp.ClientSession,
+        bus_stop_id: str,
+        bus_numbers: list[str],
+        parse_stage: ParseStage | None = None,
+    ):
         """Initialize the API class."""
         self.session = session
         self.bus_stop_id = bus_stop_id
         self.bus_numbers = bus_numbers
+        self.parse_stage = parse_stage
+        self._etag = None
+        self._last_modified = None
+        self._digest = None
+        self._buses = None
+
+    async def fetch_buses(self, metrics: StopMetrics | None = None):
+        """Retrieve the list of buses for the bus stop.
 
-    async def fetch_buses(self):
-        """Retrieve the list of buses for the bus stop."""
+        When the response is not modified, or its body is byte-identical to
+        the previous one, the previously returned list object is returned
+        again without decoding so callers can skip unchanged data. Latency,
+        response size and decode time are recorded into ``metrics``.
+        """
         try:
-            async with async_timeout.timeout(10):
-                url = f"{BASE_URL}?busStopId={self.bus_stop_id}"
-                async with self.session.get(url) as response:
-                    if response.status != 200:
-                        _LOGGER.error("API 응답 실패: %s", response.status)
-                        raise Exception(f"API 응답 실패: {response.status}")
-                    data = await response.json()
-            return data.get("busesList", [])
+            headers = {}
+            if self._buses is not None:
+                if self._etag:
+                    headers["If-None-Match"] = self._etag
+                if self._last_modified:
+                    headers["If-Modified-Since"] = self._last_modified
+
+            start = time.perf_counter()
+            # The timeout comes from the session, see client.get_client
+            url = f"{BASE_URL}?busStopId={self.bus_stop_id}"
+            async with self.session.get(url, headers=headers) as response:
+                if response.status == 304 and self._buses is not None:
+                    if metrics is not None:
+                        metrics.record_response(time.perf_counter() - start, 0)
+                        metrics.not_modified += 1
+                    return self._buses
+                if response.status != 200:
+                    _LOGGER.error("API 응답 실패: %s", response.status)
+                    raise Exception(f"API 응답 실패: {response.status}")
+                body = await response.read()
+                self._etag = response.headers.get("ETag")
+                self._last_modified = response.headers.get("Last-Modified")
+            if metrics is not None:
+                metrics.record_response(time.perf_counter() - start, len(body))
+
+            digest = hashlib.blake2b(body, digest_size=16).digest()
+            if digest == self._digest and self._buses is not None:
+                if metrics is not None:
+                    metrics.unchanged += 1
+                return self._buses
+
+            start = time.perf_counter()
+            if self.parse_stage is not None:
+                data = await self.parse_stage.async_parse("busesInBusStopJson", json.loads, body)
+            else:
+                data = json.loads(body)
+            if metrics is not None:
+                metrics.record_decode(time.perf_counter() - start)
+            self._buses = data.get("busesList", [])
+            self._digest = digest
+            return self._buses
         except asyncio.TimeoutError:
             _LOGGER.error("API 요청 타임아웃")
             raise
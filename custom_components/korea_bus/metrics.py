@@ -0,0 +1,99 @@
+"""Per-stop hot path metrics for Korea Bus."""
+from __future__ import annotations
+
+from bisect import bisect_left
+
+LATENCY_BUCKETS_MS = (50, 100, 250, 500, 1000, 2500, 5000, 10000)
+SIZE_BUCKETS = (1024, 4096, 16384, 65536, 262144, 1048576)
+DECODE_BUCKETS_MS = (0.5, 1, 2, 5, 10, 50, 100)
+
+
+class Histogram:
+    """Fixed-bucket histogram with running count, sum and maximum."""
+
+    __slots__ = ("bounds", "buckets", "count", "total", "last", "max")
+
+    def __init__(self, bounds: tuple) -> None:
+        """Initialize the histogram with upper bucket bounds."""
+        self.bounds = bounds
+        # The last bucket counts values above every bound
+        self.buckets = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.last = 0.0
+        self.max = 0.0
+
+    def add(self, value: float) -> None:
+        """Record a value."""
+        self.buckets[bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.total += value
+        self.last = value
+        self.max = max(self.max, value)
+
+    @property
+    def mean(self) -> float | None:
+        """Return the mean of the recorded values."""
+        return self.total / self.count if self.count else None
+
+    def as_dict(self) -> dict:
+        """Return the histogram for diagnostics."""
+        labels = [f"<={bound}" for bound in self.bounds] + [f">{self.bounds[-1]}"]
+        return {
+            "count": self.count,
+            "mean": round(self.mean, 3) if self.count else None,
+            "last": round(self.last, 3),
+            "max": round(self.max, 3),
+            "buckets": dict(zip(labels, self.buckets)),
+        }
+
+
+class StopMetrics:
+    """Counters and histograms for the requests of one bus stop."""
+
+    def __init__(self) -> None:
+        """Initialize the metrics."""
+        self.latency_ms = Histogram(LATENCY_BUCKETS_MS)
+        self.response_size = Histogram(SIZE_BUCKETS)
+        self.decode_ms = Histogram(DECODE_BUCKETS_MS)
+        self.requests = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.cache_hits = 0
+        self.not_modified = 0
+        self.unchanged = 0
+        self.entities_notified = 0
+        self.last_error: str | None = None
+
+    def record_response(self, latency: float, size: int) -> None:
+        """Record a completed request; latency in seconds, size in bytes."""
+        self.requests += 1
+        self.consecutive_failures = 0
+        self.latency_ms.add(latency * 1000)
+        self.response_size.add(size)
+
+    def record_decode(self, duration: float) -> None:
+        """Record a JSON decode duration in seconds."""
+        self.decode_ms.add(duration * 1000)
+
+    def record_failure(self, error: BaseException) -> None:
+        """Record a failed request."""
+        self.failures += 1
+        self.consecutive_failures += 1
+        self.last_error = f"{type(error).__name__}: {error}"
+
+    def as_dict(self) -> dict:
+        """Return the metrics for diagnostics."""
+        return {
+            "requests": self.requests,
+            "failures": self.failures,
+            "consecutive_failures": self.consecutive_failures,
+            "last_error": self.last_error,
+            "cache_hits": self.cache_hits,
+            "not_modified": self.not_modified,
+            "unchanged": self.unchanged,
+            "entities_notified": self.entities_notified,
+            "latency_ms": self.latency_ms.as_dict(),
+            "response_size": self.response_size.as_dict(),
+            "decode_ms": self.decode_ms.as_dict(),
+        }
@@ -0,0 +1,77 @@
+"""Executor-backed parse stage for Korea Bus."""
+from __future__ import annotations
+
+from collections.abc import Callable
+import logging
+import time
+from typing import Any
+
+from homeassistant.core import HomeAssistant
+
+from .const import DOMAIN, DATA_PARSE_STAGE, PARSE_EXECUTOR_THRESHOLD
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class ParseTiming:
+    """Accumulated parse durations for one kind of payload."""
+
+    __slots__ = ("count", "total", "last", "max", "bytes")
+
+    def __init__(self) -> None:
+        """Initialize the timing."""
+        self.count = 0
+        self.total = 0.0
+        self.last = 0.0
+        self.max = 0.0
+        self.bytes = 0
+
+    def add(self, duration: float, size: int) -> None:
+        """Record one parse duration in seconds and the payload size."""
+        self.count += 1
+        self.bytes += size
+        self.total += duration
+        self.last = duration
+        self.max = max(self.max, duration)
+
+
+class ParseStage:
+    """Parse payloads inline, or in the executor when they are large.
+
+    Small payloads are cheaper to parse on the event loop than to hand off
+    to a thread; large scrapes would otherwise stall the loop.
+    """
+
+    def __init__(self, hass: HomeAssistant, threshold: int = PARSE_EXECUTOR_THRESHOLD) -> None:
+        """Initialize the parse stage."""
+        self.hass = hass
+        self.threshold = threshold
+        self.timings: dict[str, ParseTiming] = {}
+
+    async def async_parse(self, kind: str, parser: Callable[..., Any], payload, *args) -> Any:
+        """Parse a payload and record how long it took."""
+        offload = len(payload) >= self.threshold
+        start = time.perf_counter()
+        if offload:
+            result = await self.hass.async_add_executor_job(parser, payload, *args)
+        else:
+            result = parser(payload, *args)
+        duration = time.perf_counter() - start
+
+        self.timings.setdefault(kind, ParseTiming()).add(duration, len(payload))
+        _LOGGER.debug(
+            "%s 파싱 %.1fms (%s bytes, %s)",
+            kind,
+            duration * 1000,
+            len(payload),
+            "executor" if offload else "inline",
+        )
+        return result
+
+
+def get_parse_stage(hass: HomeAssistant) -> ParseStage:
+    """Return the shared parse stage, creating it on first use."""
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    if DATA_PARSE_STAGE not in domain_data:
+        domain_data[DATA_PARSE_STAGE] = ParseStage(hass)
+    return domain_data[DATA_PARSE_STAGE]
@@ -0,0 +1,172 @@
+"""Projection of Kakao bus lists into compact arrival records."""
+from __future__ import annotations
+
+from datetime import datetime
+import logging
+
+from .eta import arrival_anchor, parse_collect_datetime
+from .scheduler import parse_service_span
+
+_LOGGER = logging.getLogger(__name__)
+
+ROUTE_FIELDS = {
+    "next_stop": "nextBusStopName",
+    "direction": "direction",
+    "bus_type": "typeName",
+    "first_time": "first",
+    "last_time": "last",
+    "intervals": "intervals",
+}
+
+# Fields of the first and the second approaching vehicle
+VEHICLE_FIELDS = (
+    {
+        "arrival_time": "arrivalTime",
+        "vehicle_number": "vehicleNumber",
+        "current_stop": "currentBusStopName",
+        "vehicle_state_message": "vehicleStateMessage",
+        "remain_seat": "remainSeat",
+        "updated_at": "collectDateTime",
+        "last_vehicle": "lastVehicle",
+        "bus_stop_count": "busStopCount",
+    },
+    {
+        "arrival_time": "arrivalTime2",
+        "vehicle_number": "vehicleNumber2",
+        "current_stop": "currentBusStopName2",
+        "vehicle_state_message": "vehicleStateMessage2",
+        "remain_seat": "remainSeat2",
+        "updated_at": "collectDateTime2",
+        "last_vehicle": "lastVehicle2",
+        "bus_stop_count": "busStopCount2",
+    },
+)
+
+
+def format_collect_datetime(collect_datetime_str) -> str | None:
+    """Format collectDateTime string to readable format."""
+    if not collect_datetime_str:
+        return None
+    collect_datetime = parse_collect_datetime(collect_datetime_str)
+    if collect_datetime is None:
+        _LOGGER.error("collectDateTime 형식이 유효하지 않습니다: %s", collect_datetime_str)
+        return None
+    return collect_datetime.strftime("%Y-%m-%d %H:%M:%S")
+
+
+def parse_int(value, default=None) -> int | None:
+    """Parse a numeric Kakao field, which may be a string, missing or malformed."""
+    try:
+        return int(value)
+    except (ValueError, TypeError):
+        return default
+
+
+class VehicleArrival:
+    """Arrival information for one approaching vehicle."""
+
+    __slots__ = (
+        "arrival_time",
+        "arrival_at",
+        "vehicle_number",
+        "current_stop",
+        "vehicle_state_message",
+        "remain_seat",
+        "updated_at",
+        "last_vehicle",
+        "bus_stop_count",
+    )
+
+    def __init__(self, bus: dict, fields: dict, now: datetime) -> None:
+        """Parse the vehicle fields of a Kakao bus entry."""
+        raw_arrival_time = bus.get(fields["arrival_time"], 0)
+        self.arrival_time = parse_int(raw_arrival_time)
+        if self.arrival_time is None:
+            _LOGGER.error("%s 형식이 올바르지 않습니다: %s", fields["arrival_time"], raw_arrival_time)
+        self.arrival_at = arrival_anchor(
+            raw_arrival_time, bus.get(fields["updated_at"]), now
+        )
+        self.vehicle_number = bus.get(fields["vehicle_number"])
+        self.current_stop = bus.get(fields["current_stop"])
+        self.vehicle_state_message = bus.get(fields["vehicle_state_message"])
+        self.remain_seat = bus.get(fields["remain_seat"])
+        self.updated_at = format_collect_datetime(bus.get(fields["updated_at"]))
+        self.last_vehicle = bus.get(fields["last_vehicle"])
+        self.bus_stop_count = bus.get(fields["bus_stop_count"])
+
+    def seconds_left(self, now: datetime) -> int | None:
+        """Return the seconds until arrival interpolated from the anchor."""
+        if self.arrival_at is None:
+            return None
+        return max(0, int((self.arrival_at - now).total_seconds()))
+
+
+class RouteArrival:
+    """Route metadata and the two approaching vehicles of one bus number."""
+
+    __slots__ = (
+        "name",
+        "next_stop",
+        "direction",
+        "bus_type",
+        "first_time",
+        "last_time",
+        "intervals",
+        "service_span",
+        "vehicles",
+    )
+
+    def __init__(self, bus: dict, now: datetime) -> None:
+        """Parse a Kakao bus entry."""
+        self.name = bus.get("name")
+        self.next_stop = bus.get(ROUTE_FIELDS["next_stop"])
+        self.direction = bus.get(ROUTE_FIELDS["direction"])
+        self.bus_type = bus.get(ROUTE_FIELDS["bus_type"])
+        self.first_time = bus.get(ROUTE_FIELDS["first_time"])
+        self.last_time = bus.get(ROUTE_FIELDS["last_time"])
+        self.intervals = bus.get(ROUTE_FIELDS["intervals"])
+        self.service_span = parse_service_span(self.first_time, self.last_time)
+        self.vehicles = tuple(
+            VehicleArrival(bus, fields, now) for fields in VEHICLE_FIELDS
+        )
+
+
+def project_buses(
+    buses_info: list[dict], bus_numbers: list[str], now: datetime
+) -> dict[str, RouteArrival]:
+    """Build arrival records for the subscribed bus numbers only."""
+    wanted = set(bus_numbers)
+    return {
+        bus.get("name"): RouteArrival(bus, now)
+        for bus in buses_info
+        if bus.get("name") in wanted
+    }
+
+
+class FetchLog:
+    """The last bus list processed per stop and route by a shared consumer.
+
+    Entries sharing a stop process the same fetch, so the history, the ETA
+    correction, the vehicle index and the transition events use this to
+    handle every fetch of a route once. Only the identity of the list is
+    compared, and a stop is forgotten when nobody subscribes to it anymore.
+    """
+
+    __slots__ = ("_seen",)
+
+    def __init__(self) -> None:
+        """Initialize the log."""
+        self._seen: dict[tuple[str, str], object] = {}
+
+    def first(self, bus_stop_id: str, bus_number: str, buses_info: list[dict]) -> bool:
+        """Return whether a fetch of a route is new, marking it as processed."""
+        key = (bus_stop_id, bus_number)
+        if self._seen.get(key) is buses_info:
+            return False
+        self._seen[key] = buses_info
+        return True
+
+    def forget(self, bus_stop_id: str) -> None:
+        """Drop the fetches of a stop."""
+        for key in [key for key in self._seen if key[0] == bus_stop_id]:
+            del self._seen[key]
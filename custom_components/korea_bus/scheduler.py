@@ -0,0 +1,128 @@
+"""Arrival-aware polling interval for Korea Bus."""
+from __future__ import annotations
+
+from datetime import datetime, time, timedelta
+from functools import lru_cache
+
+from homeassistant.util import dt as dt_util
+
+from .const import ADAPTIVE_ETA_RATIO, KAKAO_TIME_ZONE, SERVICE_END_GRACE
+
+DAY = 24 * 3600
+
+
+def _service_hour_minute(value) -> tuple[int, int] | None:
+    """Parse a Kakao ``first``/``last`` value such as ``05:30`` or ``0530``."""
+    if not value:
+        return None
+    digits = "".join(ch for ch in str(value) if ch.isdigit())
+    if len(digits) not in (3, 4):
+        return None
+    digits = digits.zfill(4)
+    hour, minute = int(digits[:2]), int(digits[2:])
+    if hour >= 48 or minute > 59:
+        return None
+    return hour, minute
+
+
+def parse_service_span(first, last) -> tuple[time, time] | None:
+    """Parse the first and last departure of a route into a service span.
+
+    Hours of 24 or more, as in a last departure of ``25:30``, are folded
+    into the day, so a route running past midnight ends up with its last
+    departure before its first. Returns None when either is unknown or the
+    route runs all day, which shows as the same first and last time
+    (``04:00``/``04:00`` or ``00:00``/``24:00``).
+    """
+    start = _service_hour_minute(first)
+    end = _service_hour_minute(last)
+    if start is None or end is None:
+        return None
+    span = time(start[0] % 24, start[1]), time(end[0] % 24, end[1])
+    return None if span[0] == span[1] else span
+
+
+class ServiceCalendar:
+    """The combined service windows of the routes of one stop.
+
+    Windows are kept in seconds of the Korean day, merged and sorted, with
+    routes running past midnight split in two, so checking a time is a scan
+    of a few ranges instead of parsing every route again.
+    """
+
+    __slots__ = ("windows",)
+
+    def __init__(self, spans: tuple[tuple[time, time], ...]) -> None:
+        """Build the windows from the first and last departure of every route."""
+        ranges = []
+        for first, last in spans:
+            start = first.hour * 3600 + first.minute * 60
+            # Buses leaving at the last departure still reach the stop afterwards
+            end = last.hour * 3600 + last.minute * 60 + SERVICE_END_GRACE
+            if first > last:
+                end += DAY
+            ranges.append((start, min(end, DAY)))
+            if end > DAY:
+                ranges.append((0, end - DAY))
+        windows: list[list[int]] = []
+        for start, end in sorted(ranges):
+            if windows and start <= windows[-1][1]:
+                windows[-1][1] = max(windows[-1][1], end)
+            else:
+                windows.append([start, end])
+        self.windows = tuple((start, end) for start, end in windows)
+
+    def seconds_until_service(self, now: datetime) -> float:
+        """Return 0 while any route is running, otherwise seconds until one starts."""
+        local = now.astimezone(dt_util.get_time_zone(KAKAO_TIME_ZONE))
+        current = local.hour * 3600 + local.minute * 60 + local.second + local.microsecond / 1e6
+        for start, end in self.windows:
+            if start <= current < end:
+                return 0
+            if start > current:
+                return start - current
+        return self.windows[0][0] + DAY - current
+
+
+@lru_cache(maxsize=256)
+def service_calendar(spans: tuple[tuple[time, time] | None, ...]) -> ServiceCalendar | None:
+    """Return the calendar of a set of routes, built once per distinct set.
+
+    Returns None when a route runs all day or has no known service hours,
+    since the stop then has to be treated as always in service.
+    """
+    if not spans or any(span is None for span in spans):
+        return None
+    return ServiceCalendar(spans)
+
+
+def nearest_arrival(routes: dict) -> int | None:
+    """Return the smallest positive arrival time across the tracked routes."""
+    nearest = None
+    for route in routes.values():
+        for vehicle in route.vehicles:
+            arrival_time = vehicle.arrival_time
+            if arrival_time and arrival_time > 0 and (nearest is None or arrival_time < nearest):
+                nearest = arrival_time
+    return nearest
+
+
+def next_interval(
+    routes: dict,
+    floor: int,
+    ceiling: int,
+    opens_in: float | None = None,
+) -> timedelta:
+    """Pick the next polling interval from the projected arrival records.
+
+    Polls quickly when a bus is close and backs off when the nearest bus is
+    far away. Without any bus, ``opens_in`` wakes it when a stop that is
+    about to open starts its service.
+    """
+    nearest = nearest_arrival(routes)
+    if nearest is not None:
+        seconds = min(max(nearest * ADAPTIVE_ETA_RATIO, floor), ceiling)
+        return timedelta(seconds=seconds)
+    if opens_in:
+        return timedelta(seconds=min(max(opens_in, floor), ceiling))
+    return timedelta(seconds=ceiling)
@@ -0,0 +1,206 @@
+"""Single-pass extraction of Kakao searchView and busStationInfo pages."""
+from __future__ import annotations
+
+from html.parser import HTMLParser
+
+STOP_NUMBER_LABEL = "버스 정류장 번호 : "
+
+
+class _ItemParser(HTMLParser):
+    """Stream tag events and collect fields of selected ``<li>`` items.
+
+    Only elements inside a selected item are tracked. Subclasses decide
+    which ``<li>`` starts an item, which elements to capture text from and
+    whether the text node right after a captured element is wanted.
+    """
+
+    def __init__(self) -> None:
+        super().__init__(convert_charrefs=True)
+        self._item: dict | None = None
+        self._stack: list[str] = []
+        # Active captures as [kind, stack depth, text chunks]
+        self._captures: list[list] = []
+        self._sibling_of: str | None = None
+
+    def _start_item(self, attrs: dict) -> dict | None:
+        raise NotImplementedError
+
+    def _capture_kind(self, tag: str, classes: list[str]) -> str | None:
+        raise NotImplementedError
+
+    def _captured(self, kind: str, text: str) -> bool:
+        """Handle a captured element and return whether its sibling is wanted."""
+        raise NotImplementedError
+
+    def _sibling(self, kind: str, text: str | None) -> None:
+        """Handle the text node following a captured element, if any."""
+
+    def _end_item(self, item: dict) -> None:
+        raise NotImplementedError
+
+    def _clear_sibling(self) -> None:
+        if self._sibling_of is not None:
+            kind, self._sibling_of = self._sibling_of, None
+            self._sibling(kind, None)
+
+    def handle_starttag(self, tag, attrs):
+        self._clear_sibling()
+        if self._item is None:
+            if tag == "li":
+                self._item = self._start_item(dict(attrs))
+                if self._item is not None:
+                    self._stack = ["li"]
+            return
+
+        self._stack.append(tag)
+        classes = (dict(attrs).get("class") or "").split()
+        if (kind := self._capture_kind(tag, classes)) is not None:
+            self._captures.append([kind, len(self._stack), []])
+
+    def handle_startendtag(self, tag, attrs):
+        self._clear_sibling()
+
+    def handle_endtag(self, tag):
+        self._clear_sibling()
+        if self._item is None or tag not in self._stack:
+            return
+
+        # Close everything up to the matching tag, tolerating unclosed tags
+        while self._stack:
+            if self._stack.pop() == tag:
+                break
+        while self._captures and self._captures[-1][1] > len(self._stack):
+            kind, _, chunks = self._captures.pop()
+            if self._captured(kind, "".join(chunks)):
+                self._sibling_of = kind
+
+        if not self._stack:
+            item, self._item = self._item, None
+            self._end_item(item)
+
+    def handle_data(self, data):
+        if self._sibling_of is not None:
+            kind, self._sibling_of = self._sibling_of, None
+            self._sibling(kind, data)
+        for capture in self._captures:
+            capture[2].append(data)
+
+
+class _SearchViewParser(_ItemParser):
+    """Extract ``li.search_item`` blocks of the searchView page."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.results: dict[str, dict] = {}
+
+    def _start_item(self, attrs):
+        if "search_item" not in (attrs.get("class") or "").split():
+            return None
+        return {
+            "id": attrs.get("data-id"),
+            "title": attrs.get("data-title"),
+            "stop_number": None,
+            "direction": None,
+            "location": None,
+            "bus_types": [],
+            "label_seen": False,
+            "bar_seen": False,
+        }
+
+    def _capture_kind(self, tag, classes):
+        if tag != "span":
+            return None
+        if "screen_out" in classes:
+            return "screen_out"
+        if "txt_bar" in classes:
+            return "txt_bar"
+        if "txt_ginfo" in classes:
+            return "txt_ginfo"
+        if any(cls.startswith("bus_type") for cls in classes):
+            return "bus_type"
+        return None
+
+    def _captured(self, kind, text):
+        item = self._item
+        # Like find(), only the first label and separator are followed
+        if kind == "screen_out" and text == STOP_NUMBER_LABEL and not item["label_seen"]:
+            item["label_seen"] = True
+            return True
+        if kind == "txt_bar" and not item["bar_seen"]:
+            item["bar_seen"] = True
+            return True
+        if kind == "txt_ginfo" and item["location"] is None:
+            item["location"] = text.strip()
+        elif kind == "bus_type":
+            item["bus_types"].append(text)
+        return False
+
+    def _sibling(self, kind, text):
+        value = text.strip() if text is not None else None
+        if kind == "screen_out":
+            self._item["stop_number"] = value
+        else:
+            self._item["direction"] = value
+
+    def _end_item(self, item):
+        stop_number = item["stop_number"]
+        direction = item["direction"]
+        # "Unknown"이 아닌 경우만 결과에 추가, 이름 없는 항목은 제외
+        if item["id"] and item["title"] and stop_number and direction:
+            self.results[item["id"]] = {
+                "name": item["title"],
+                "stop_number": stop_number,
+                "direction": direction,
+                "location": item["location"] if item["location"] is not None else "Unknown",
+                "bus_types": item["bus_types"],
+                "title": f"{item['title']}({stop_number}) - {direction}",
+            }
+
+
+class _StationInfoParser(_ItemParser):
+    """Extract ``li[data-id]`` blocks of the busStationInfo page."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.buses: list[dict] = []
+
+    def _start_item(self, attrs):
+        if "data-id" not in attrs:
+            return None
+        return {"number": None, "type": None}
+
+    def _capture_kind(self, tag, classes):
+        if tag == "strong" and "tit_g" in classes:
+            return "number"
+        if tag == "span" and any("bus_type" in cls for cls in classes):
+            return "type"
+        return None
+
+    def _captured(self, kind, text):
+        if self._item[kind] is None:
+            self._item[kind] = text
+        return False
+
+    def _end_item(self, item):
+        if item["number"] is not None:
+            bus_type = item["type"] if item["type"] is not None else "Unknown"
+            self.buses.append({
+                "number": item["number"].strip(),
+                "type": bus_type.strip(),
+            })
+
+
+def parse_bus_stop_list(html: str) -> dict[str, dict]:
+    """Parse the bus stops of a searchView page."""
+    parser = _SearchViewParser()
+    parser.feed(html)
+    parser.close()
+    return parser.results
+
+
+def parse_bus_number_list(html: str) -> list[dict]:
+    """Parse the bus numbers of a busStationInfo page."""
+    parser = _StationInfoParser()
+    parser.feed(html)
+    parser.close()
+    return parser.buses
@@ -1,40 +1,69 @@
 """Support for Korea Bus sensors."""
-from datetime import timedelta, datetime
 import logging
-import aiohttp
-import asyncio
 
-from homeassistant.components.sensor import SensorEntity, SensorDeviceClass
+from homeassistant.components.sensor import (
+    SensorEntity,
+    SensorDeviceClass,
+    SensorStateClass,
+)
 from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import EntityCategory, UnitOfInformation, UnitOfTime
 from homeassistant.core import HomeAssistant, callback
-from homeassistant.helpers.aiohttp_client import async_get_clientsession
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
-from homeassistant.helpers.update_coordinator import (
-    CoordinatorEntity,
-    DataUpdateCoordinator,
-    UpdateFailed,
-)
-from homeassistant.const import CONF_SCAN_INTERVAL
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
 from homeassistant.util import dt as dt_util
 
 from .const import (
     DOMAIN,
-    CONF_BUS_STOP_ID,
-    CONF_BUS_NUMBER,
-    DEFAULT_SCAN_INTERVAL,
+    CONF_DIAGNOSTIC_SENSORS,
+    CONF_ATTRIBUTE_PROFILE,
+    CONF_JOURNEY_SENSORS,
+    DEFAULT_DIAGNOSTIC_SENSORS,
+    DEFAULT_ATTRIBUTE_PROFILE,
+    DEFAULT_JOURNEY_SENSORS,
+    PROFILE_FULL,
+    PROFILE_MINIMAL,
 )
-from .kakao import KakaoBusAPI
+from .breaker import STATE_CLOSED
+from .metrics import Histogram, StopMetrics
+from .projection import RouteArrival, VehicleArrival
 
 _LOGGER = logging.getLogger(__name__)
 
+# Route metadata that the full profile repeats on the first-bus sensor
+ROUTE_ATTRIBUTES = frozenset(
+    {"next_stop", "direction", "bus_type", "first_time", "last_time", "intervals"}
+)
+
 
 def create_bus_entities(coordinator, entry):
     """Create all bus sensor entities for the given config entry."""
-    bus_numbers = entry.data.get(CONF_BUS_NUMBER, [])
+    diagnostics = entry.options.get(CONF_DIAGNOSTIC_SENSORS, DEFAULT_DIAGNOSTIC_SENSORS)
+    profile = entry.options.get(CONF_ATTRIBUTE_PROFILE, DEFAULT_ATTRIBUTE_PROFILE)
     entities = []
-    for bus_number in bus_numbers:
-        entities.append(KoreaBusSensor(coordinator, entry, bus_number))
-        entities.append(KoreaBusNextSensor(coordinator, entry, bus_number))
+    for bus_stop_id, bus_numbers in coordinator.stops.items():
+        for bus_number in bus_numbers:
+            entities.append(KoreaBusSensor(coordinator, entry, bus_stop_id, bus_number))
+            entities.append(KoreaBusNextSensor(coordinator, entry, bus_stop_id, bus_number))
+            if profile != PROFILE_FULL:
+                entities.append(KoreaBusRouteSensor(coordinator, entry, bus_stop_id, bus_number))
+        if diagnostics:
+            for key in DIAGNOSTIC_SENSORS:
+                entities.append(KoreaBusDiagnosticSensor(coordinator, entry, bus_stop_id, key))
+    if entry.options.get(CONF_JOURNEY_SENSORS, DEFAULT_JOURNEY_SENSORS):
+        stops = list(coordinator.stops)
+        # One sensor per bus number for every pair of stops it is tracked at
+        for index, from_stop in enumerate(stops):
+            for to_stop in stops[index + 1:]:
+                for bus_number in coordinator.stops[from_stop]:
+                    if bus_number in coordinator.stops[to_stop]:
+                        entities.append(
+                            KoreaBusJourneySensor(coordinator, entry, bus_number, from_stop, to_stop)
+                        )
+    if coordinator.aggregate:
+        entities.append(KoreaBusEarliestSensor(coordinator, entry))
+        entities.append(KoreaBusUpcomingSensor(coordinator, entry))
+        entities.append(KoreaBusSeatSensor(coordinator, entry))
     return entities
 
 async def async_setup_entry(
@@ -43,93 +72,87 @@ async def async_setup_entry(
     async_add_entities: AddEntitiesCallback,
 ) -> None:
     """Set up the Korea Bus sensor from a config entry."""
-    session = async_get_clientsession(hass)
-    
-    coordinator = BusDataUpdateCoordinator(
-        hass,
-        session,
-        entry,
-        _LOGGER,
-        name=DOMAIN,
-        update_interval=timedelta(
-            seconds=entry.options.get(CONF_SCAN_INTERVAL, DEFAULT_SCAN_INTERVAL)
-        ),
-    )
-
-    # Fetch initial data
-    await coordinator.async_config_entry_first_refresh()
+    coordinator = hass.data[DOMAIN][entry.entry_id]
 
     entities = create_bus_entities(coordinator, entry)
     async_add_entities(entities)
 
 
-class BusDataUpdateCoordinator(DataUpdateCoordinator):
-    """Class to manage fetching bus data."""
-
-    def __init__(
-        self,
-        hass: HomeAssistant,
-        session: aiohttp.ClientSession,
-        entry: ConfigEntry,
-        logger: logging.Logger,
-        name: str,
-        update_interval: timedelta,
-    ) -> None:
-        """Initialize the coordinator."""
-        super().__init__(
-            hass,
-            logger,
-            name=name,
-            update_interval=update_interval,
-        )
-        self.session = session
-        self.bus_stop_id = entry.data[CONF_BUS_STOP_ID]
-        self.bus_numbers = entry.data.get(CONF_BUS_NUMBER, [])
-
-    async def _async_update_data(self):
-        """Fetch data from API."""
-        try:
-            api = KakaoBusAPI(self.session, self.bus_stop_id, self.bus_numbers)
-            buses_info = await api.get_all_bus_info()
-            if not buses_info:
-                _LOGGER.debug("버스 정보가 없습니다.")
-                return {}  # Avoid returning an empty dictionary to avoid UpdateFailed
-            
-            # Convert bus information to a dictionary with bus numbers as keys
-            buses_dict = {bus.get("name"): bus for bus in buses_info}
-            return buses_dict
-        except asyncio.TimeoutError as error:
-            raise UpdateFailed(f"Timeout error fetching data: {error}")
-        except aiohttp.ClientError as error:
-            raise UpdateFailed(f"Error fetching data: {error}")
-        except Exception as error:
-            raise UpdateFailed(f"Unexpected error: {error}")
-
-
 class KoreaBusBaseSensor(CoordinatorEntity, SensorEntity):
     """Base class for Korea Bus Sensors."""
 
-    def __init__(self, coordinator, entry, bus_number):
-        super().__init__(coordinator)
+    # Index of the vehicle in RouteArrival.vehicles this sensor reports
+    VEHICLE_INDEX = 0
+
+    # Attributes that follow from the arrival timestamp or the collect time.
+    # A change in these alone does not warrant a new state write.
+    VOLATILE_ATTRIBUTES = frozenset(
+        {"arrival_time", "time_left", "arrival_datetime", "updated_at", "corrected_arrival"}
+    )
+
+    # Volatile values follow from the recorded state, route metadata rarely
+    # changes; neither is worth a new attributes row in the recorder
+    _unrecorded_attributes = VOLATILE_ATTRIBUTES | ROUTE_ATTRIBUTES
+
+    def __init__(self, coordinator, entry, bus_stop_id, bus_number):
+        # The bus stop ID is the listener context, see async_update_listeners
+        super().__init__(coordinator, bus_stop_id)
         self.entry = entry
+        self.bus_stop_id = bus_stop_id
         self.bus_number = bus_number
+        self.profile = entry.options.get(CONF_ATTRIBUTE_PROFILE, DEFAULT_ATTRIBUTE_PROFILE)
         self._state = None
+        self._written = None
+        self._static_source = None
+        self._static_attrs = {}
 
     @property
     def device_class(self):
         return SensorDeviceClass.TIMESTAMP
 
+    @property
+    def native_value(self):
+        return self._state
+
+    def _route(self) -> RouteArrival | None:
+        return self.coordinator.data.get(self.bus_stop_id, {}).get(self.bus_number)
+
+    def _vehicle(self) -> VehicleArrival | None:
+        route = self._route()
+        return route.vehicles[self.VEHICLE_INDEX] if route else None
+
+    def _refresh_state(self) -> bool:
+        """Update the arrival timestamp and return whether a write is needed."""
+        vehicle = self._vehicle()
+        value = vehicle.arrival_at if vehicle else None
+        moved = (value is None) != (self._state is None) or (
+            value is not None
+            and abs((value - self._state).total_seconds()) > self.coordinator.state_tolerance
+        )
+        if moved:
+            self._state = value
+
+        written = (
+            self.available,
+            {
+                key: attr
+                for key, attr in self.extra_state_attributes.items()
+                if key not in self.VOLATILE_ATTRIBUTES
+            },
+        )
+        changed = written != self._written
+        self._written = written
+        # A running countdown is an explicit request for periodic writes
+        return moved or changed or self.coordinator.countdown_interval > 0
+
     @callback
     def _handle_coordinator_update(self) -> None:
-        self.async_write_ha_state()
+        if self._refresh_state():
+            self.async_write_ha_state()
 
     async def async_added_to_hass(self):
+        self._refresh_state()
         await super().async_added_to_hass()
-        self.async_on_remove(
-            self.coordinator.async_add_listener(self.async_write_ha_state)
-        )
-        if self.coordinator.last_update_success:
-            self.async_schedule_update_ha_state(True)
 
     @property
     def unique_id(self):
@@ -139,193 +162,392 @@ class KoreaBusBaseSensor(CoordinatorEntity, SensorEntity):
     def name(self):
         return self._attr_name
 
-    def format_collect_datetime(self, collect_datetime_str):
-        """Format collectDateTime string to readable format."""
-        try:
-            collect_datetime = datetime.strptime(collect_datetime_str, "%Y%m%d%H%M%S")
-            return collect_datetime.strftime("%Y-%m-%d %H:%M:%S")
-        except ValueError:
-            _LOGGER.error(f"collectDateTime 형식이 유효하지 않습니다: {collect_datetime_str}")
-            return "알 수 없음"
+    def _or_unknown(self, value, default="알 수 없음"):
+        """Return the value or a placeholder, which only the full profile keeps."""
+        if value is not None:
+            return value
+        return default if self.profile == PROFILE_FULL else None
+
+    def _static_attributes(self, route: RouteArrival, vehicle: VehicleArrival) -> dict:
+        """Return the attributes that only change when new data is fetched."""
+        return {
+            "vehicle_number": self._or_unknown(vehicle.vehicle_number),
+            "current_stop": self._or_unknown(vehicle.current_stop),
+            "vehicle_state_message": self._or_unknown(vehicle.vehicle_state_message),
+            "remain_seat": self._or_unknown(vehicle.remain_seat, "-1"),
+            "updated_at": self._or_unknown(vehicle.updated_at),
+            "last_vehicle": self._or_unknown(vehicle.last_vehicle),
+            "bus_stop_count": self._or_unknown(vehicle.bus_stop_count),
+        }
+
+    @property
+    def extra_state_attributes(self):
+        route = self._route()
+        if not route:
+            return {}
+        circuit = self.coordinator.circuit_attributes(self.bus_stop_id)
+        if self.profile == PROFILE_MINIMAL:
+            # Only say so when the timestamp is not live
+            return circuit if circuit.get("circuit_state", STATE_CLOSED) != STATE_CLOSED else {}
+        vehicle = route.vehicles[self.VEHICLE_INDEX]
+        # Static attributes are built once per fetched record
+        if self._static_source is not vehicle:
+            attrs = self._static_attributes(route, vehicle)
+            if self.profile != PROFILE_FULL:
+                attrs = {key: attr for key, attr in attrs.items() if attr is not None}
+            self._static_attrs = attrs
+            self._static_source = vehicle
+
+        arrival_time = vehicle.arrival_time
+        time_left = None
+        arrival_datetime = None
+        if vehicle.arrival_at is not None:
+            arrival_datetime = vehicle.arrival_at
+            arrival_time = vehicle.seconds_left(dt_util.now())
+            minutes = arrival_time // 60
+            seconds = arrival_time % 60
+            time_left = f"{minutes}분 {seconds}초"
+        if self.profile != PROFILE_FULL:
+            # The arrival timestamp is already the state
+            attrs = {"arrival_time": arrival_time}
+            if time_left is not None:
+                attrs["time_left"] = time_left
+            return {**attrs, **self._static_attrs, **circuit}
+        return {
+            "arrival_time": arrival_time,
+            "time_left": self._or_unknown(time_left),
+            "arrival_datetime": arrival_datetime.isoformat() if arrival_datetime else "알 수 없음",
+            **self._static_attrs,
+            **circuit,
+        }
+
+    @property
+    def available(self) -> bool:
+        if not self.coordinator.available(self.bus_stop_id):
+            return False
+        vehicle = self._vehicle()
+        return vehicle is not None and vehicle.arrival_time is not None
 
 
 class KoreaBusSensor(KoreaBusBaseSensor):
     """Sensor for the first arriving bus."""
 
-    ATTR_MAP = {
-        "arrival_time": "arrivalTime",
-        "vehicle_number": "vehicleNumber",
-        "current_stop": "currentBusStopName",
-        "vehicle_state_message": "vehicleStateMessage",
-        "remain_seat": "remainSeat",
-        "updated_at": "collectDateTime",
-        "last_vehicle": "lastVehicle",
-        "bus_stop_count": "busStopCount",
-        "next_stop": "nextBusStopName",
-        "direction": "direction",
-        "bus_type": "typeName",
-        "first_time": "first",
-        "last_time": "last",
-        "intervals": "intervals",
-    }
+    VEHICLE_INDEX = 0
+
+    def __init__(self, coordinator, entry, bus_stop_id, bus_number):
+        super().__init__(coordinator, entry, bus_stop_id, bus_number)
+        self._attr_unique_id = f"{bus_stop_id}_{self.bus_number}"
+        self._attr_name = f"{self.bus_number}번 버스 도착 정보 ({bus_stop_id})"
+
+    def _static_attributes(self, route: RouteArrival, vehicle: VehicleArrival) -> dict:
+        attrs = super()._static_attributes(route, vehicle)
+        if self.profile == PROFILE_FULL:
+            attrs.update({
+                key: self._or_unknown(attr) for key, attr in _route_attributes(route).items()
+            })
+        corrector = self.coordinator.corrector
+        if corrector is not None:
+            corrected = corrector.correct(
+                self.bus_stop_id, self.bus_number, vehicle.arrival_at, dt_util.now()
+            )
+            # Unknown until enough trips of this route have been seen at this hour
+            attrs["corrected_arrival"] = (
+                corrected[0].isoformat() if corrected else self._or_unknown(None)
+            )
+            attrs["confidence"] = corrected[1] if corrected else None
+        return attrs
+
+
+class KoreaBusNextSensor(KoreaBusBaseSensor):
+    """Sensor for the second arriving bus."""
+
+    VEHICLE_INDEX = 1
+
+    def __init__(self, coordinator, entry, bus_stop_id, bus_number):
+        super().__init__(coordinator, entry, bus_stop_id, bus_number)
+        self._attr_unique_id = f"{bus_stop_id}_{self.bus_number}_next"
+        self._attr_name = f"다음 {self.bus_number}번 버스 도착 정보 ({bus_stop_id})"
+
+    def _static_attributes(self, route: RouteArrival, vehicle: VehicleArrival) -> dict:
+        attrs = super()._static_attributes(route, vehicle)
+        if vehicle.arrival_time is not None and vehicle.arrival_time <= 0:
+            attrs["vehicle_state_message"] = self._or_unknown(
+                vehicle.vehicle_state_message, "정보 없음"
+            )
+        return attrs
+
+
+class KoreaBusRouteSensor(CoordinatorEntity, SensorEntity):
+    """Route metadata of a bus number at a stop, split off the arrival sensors.
+
+    Only written when the metadata changes, so slimmer attribute profiles do
+    not lose the information.
+    """
+
+    def __init__(self, coordinator, entry, bus_stop_id, bus_number):
+        super().__init__(coordinator, bus_stop_id)
+        self.bus_stop_id = bus_stop_id
+        self.bus_number = bus_number
+        self._attr_unique_id = f"{bus_stop_id}_{bus_number}_route"
+        self._attr_name = f"{bus_number}번 버스 노선 정보 ({bus_stop_id})"
+        self._written = None
 
-    def __init__(self, coordinator, entry, bus_number):
-        super().__init__(coordinator, entry, bus_number)
-        self._attr_unique_id = f"{entry.data[CONF_BUS_STOP_ID]}_{self.bus_number}"
-        self._attr_name = f"{self.bus_number}번 버스 도착 정보 ({entry.data[CONF_BUS_STOP_ID]})"
+    def _route(self) -> RouteArrival | None:
+        return (self.coordinator.data or {}).get(self.bus_stop_id, {}).get(self.bus_number)
+
+    @property
+    def available(self) -> bool:
+        return self._route() is not None
 
     @property
     def native_value(self):
-        bus_info = self.coordinator.data.get(self.bus_number)
-        if not bus_info:
-            _LOGGER.debug(f"bus_info is None for bus {self.bus_number}.")
-            return None
-        arrival_time = bus_info.get(self.ATTR_MAP["arrival_time"], 0)
-        try:
-            arrival_time = int(arrival_time)
-            if arrival_time <= 0:
-                return None
-        except (ValueError, TypeError):
-            _LOGGER.error(f"arrivalTime 형식이 올바르지 않습니다: {arrival_time} for bus {self.bus_number}")
-            return None
-        self._state = dt_util.now() + timedelta(seconds=arrival_time)
-        return self._state
+        route = self._route()
+        return route.direction if route else None
 
     @property
     def extra_state_attributes(self):
-        bus_info = self.coordinator.data.get(self.bus_number)
-        if not bus_info:
+        route = self._route()
+        if not route:
             return {}
-        arrival_time = bus_info.get(self.ATTR_MAP["arrival_time"], 0)
-        time_left = "알 수 없음"
-        arrival_datetime = None
-        try:
-            arrival_time = int(arrival_time)
-            if arrival_time > 0:
-                arrival_datetime = dt_util.now() + timedelta(seconds=arrival_time)
-                minutes = arrival_time // 60
-                seconds = arrival_time % 60
-                time_left = f"{minutes}분 {seconds}초"
-        except (ValueError, TypeError):
-            pass
-        collect_datetime_str = bus_info.get(self.ATTR_MAP["updated_at"], None)
-        formatted_collect_dt = "알 수 없음"
-        if collect_datetime_str:
-            formatted_collect_dt = self.format_collect_datetime(collect_datetime_str)
+        return {
+            key: attr for key, attr in _route_attributes(route).items() if attr is not None
+        }
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        written = (self.available, self.native_value, self.extra_state_attributes)
+        if written != self._written:
+            self._written = written
+            self.async_write_ha_state()
+
+
+class KoreaBusJourneySensor(CoordinatorEntity, SensorEntity):
+    """Travel time of a bus number between two of the entry's stops.
+
+    Measured from the same vehicle approaching or passing both stops, in
+    whichever direction it was last seen travelling. The attributes follow
+    that vehicle to the later stop.
+    """
+
+    _attr_device_class = SensorDeviceClass.DURATION
+    _attr_native_unit_of_measurement = UnitOfTime.SECONDS
+    _attr_state_class = SensorStateClass.MEASUREMENT
+
+    def __init__(self, coordinator, entry, bus_number, from_stop, to_stop):
+        super().__init__(coordinator)
+        self.bus_number = bus_number
+        self.stops = (from_stop, to_stop)
+        self._attr_unique_id = f"{entry.entry_id}_{bus_number}_{from_stop}_{to_stop}_journey"
+        self._attr_name = f"{bus_number}번 버스 구간 소요 시간 ({from_stop}, {to_stop})"
+        self._written = None
+
+    def _travel(self):
+        """Return the latest travel time in either direction with its stops."""
+        index = self.coordinator.vehicles
+        first, second = self.stops
+        forward = index.travel(self.bus_number, first, second)
+        backward = index.travel(self.bus_number, second, first)
+        if backward is not None and (forward is None or backward.measured > forward.measured):
+            return backward, second, first
+        if forward is not None:
+            return forward, first, second
+        return None
+
+    @property
+    def available(self) -> bool:
+        return self._travel() is not None
+
+    @property
+    def native_value(self):
+        travel = self._travel()
+        return round(travel[0].seconds) if travel else None
+
+    @property
+    def extra_state_attributes(self):
+        if (travel := self._travel()) is None:
+            return {}
+        travel, from_stop, to_stop = travel
         attrs = {
-            "arrival_time": arrival_time,
-            "time_left": time_left,
-            "arrival_datetime": arrival_datetime.isoformat() if arrival_datetime else "알 수 없음",
-            "vehicle_number": bus_info.get(self.ATTR_MAP["vehicle_number"], "알 수 없음"),
-            "current_stop": bus_info.get(self.ATTR_MAP["current_stop"], "알 수 없음"),
-            "vehicle_state_message": bus_info.get(self.ATTR_MAP["vehicle_state_message"], "알 수 없음"),
-            "remain_seat": bus_info.get(self.ATTR_MAP["remain_seat"], "-1"),
-            "updated_at": formatted_collect_dt,
-            "last_vehicle": bus_info.get(self.ATTR_MAP["last_vehicle"], "알 수 없음"),
-            "bus_stop_count": bus_info.get(self.ATTR_MAP["bus_stop_count"], "알 수 없음"),
-            "next_stop": bus_info.get(self.ATTR_MAP["next_stop"], "알 수 없음"),
-            "direction": bus_info.get(self.ATTR_MAP["direction"], "알 수 없음"),
-            "bus_type": bus_info.get(self.ATTR_MAP["bus_type"], "알 수 없음"),
-            "first_time": bus_info.get(self.ATTR_MAP["first_time"], "알 수 없음"),
-            "last_time": bus_info.get(self.ATTR_MAP["last_time"], "알 수 없음"),
-            "intervals": bus_info.get(self.ATTR_MAP["intervals"], "알 수 없음"),
+            "from_stop": from_stop,
+            "to_stop": to_stop,
+            "vehicle_number": travel.vehicle_number,
+            "measured_at": dt_util.as_local(
+                dt_util.utc_from_timestamp(travel.measured)
+            ).replace(microsecond=0).isoformat(),
         }
+        sighting = self.coordinator.vehicles.vehicle(travel.vehicle_number).get(to_stop)
+        if sighting is not None and not sighting.passed:
+            # Where the vehicle is now relative to the later stop
+            attrs["stops_to_destination"] = sighting.bus_stop_count
+            attrs["arrival_at_destination"] = dt_util.as_local(
+                dt_util.utc_from_timestamp(sighting.arrival_at)
+            ).replace(microsecond=0).isoformat()
         return attrs
 
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        written = (self.native_value, self.extra_state_attributes)
+        if written != self._written:
+            self._written = written
+            self.async_write_ha_state()
+
+
+class KoreaBusAggregateSensor(CoordinatorEntity, SensorEntity):
+    """Base class for sensors over the merged arrivals of the selected routes."""
+
+    KEY = ""
+    NAME = ""
+
+    def __init__(self, coordinator, entry):
+        super().__init__(coordinator)
+        self._attr_unique_id = f"{entry.entry_id}_{self.KEY}"
+        self._attr_name = f"{self.NAME} ({', '.join(coordinator.stops)})"
+        self._written = None
+
     @property
     def available(self) -> bool:
-        bus_data = self.coordinator.data.get(self.bus_number)
-        if not self.coordinator.last_update_success or not bus_data:
-            return False
-        arrival_time_str = bus_data.get(self.ATTR_MAP["arrival_time"], '0')
-        try:
-            int(arrival_time_str)
-            return True
-        except (ValueError, TypeError):
-            return False
+        return self.coordinator.last_update_success and self.coordinator.summary is not None
 
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        # The summary is only rebuilt when the arrivals change
+        written = (self.available, self.coordinator.summary)
+        if written != self._written:
+            self._written = written
+            self.async_write_ha_state()
 
-class KoreaBusNextSensor(KoreaBusBaseSensor):
-    """Sensor for the second arriving bus."""
 
-    ATTR_MAP = {
-        "arrival_time": "arrivalTime2",
-        "vehicle_number": "vehicleNumber2",
-        "current_stop": "currentBusStopName2",
-        "vehicle_state_message": "vehicleStateMessage2",
-        "remain_seat": "remainSeat2",
-        "updated_at": "collectDateTime2",
-        "last_vehicle": "lastVehicle2",
-        "bus_stop_count": "busStopCount2",
-    }
+class KoreaBusEarliestSensor(KoreaBusAggregateSensor):
+    """Sensor for the first arriving bus of any selected route."""
 
-    def __init__(self, coordinator, entry, bus_number):
-        super().__init__(coordinator, entry, bus_number)
-        self._attr_unique_id = f"{entry.data[CONF_BUS_STOP_ID]}_{self.bus_number}_next"
-        self._attr_name = f"다음 {self.bus_number}번 버스 도착 정보 ({entry.data[CONF_BUS_STOP_ID]})"
+    KEY = "earliest"
+    NAME = "가장 빠른 버스 도착 정보"
+    _attr_device_class = SensorDeviceClass.TIMESTAMP
 
     @property
     def native_value(self):
-        bus_info = self.coordinator.data.get(self.bus_number)
-        if not bus_info:
-            _LOGGER.debug(f"bus_info is None for bus {self.bus_number}.")
-            return None
-        arrival_time = bus_info.get(self.ATTR_MAP["arrival_time"], 0)
-        try:
-            arrival_time = int(arrival_time)
-            if arrival_time <= 0:
-                return None
-        except (ValueError, TypeError):
-            _LOGGER.error(f"arrivalTime2 형식이 올바르지 않습니다: {arrival_time} for bus {self.bus_number}")
-            return None
-        self._state = dt_util.now() + timedelta(seconds=arrival_time)
-        return self._state
+        earliest = self.coordinator.summary.earliest if self.coordinator.summary else None
+        return earliest.arrival_at if earliest else None
+
+    @property
+    def extra_state_attributes(self):
+        earliest = self.coordinator.summary.earliest if self.coordinator.summary else None
+        return earliest.as_dict() if earliest else {}
+
+
+class KoreaBusUpcomingSensor(KoreaBusAggregateSensor):
+    """Sensor listing the next arrivals of the selected routes."""
+
+    KEY = "upcoming"
+    NAME = "다가오는 버스 도착 정보"
+    _attr_icon = "mdi:bus-multiple"
+
+    @property
+    def native_value(self):
+        summary = self.coordinator.summary
+        return len(summary.upcoming) if summary else None
 
     @property
     def extra_state_attributes(self):
-        bus_info = self.coordinator.data.get(self.bus_number)
-        if not bus_info:
+        summary = self.coordinator.summary
+        if not summary:
             return {}
-        arrival_time = bus_info.get(self.ATTR_MAP["arrival_time"], 0)
-        time_left = "알 수 없음"
-        arrival_datetime = None
-        try:
-            arrival_time = int(arrival_time)
-            if arrival_time > 0:
-                arrival_datetime = dt_util.now() + timedelta(seconds=arrival_time)
-                minutes = arrival_time // 60
-                seconds = arrival_time % 60
-                time_left = f"{minutes}분 {seconds}초"
-        except (ValueError, TypeError):
-            pass
-        collect_datetime_str = bus_info.get(self.ATTR_MAP["updated_at"], None)
-        formatted_collect_dt = "알 수 없음"
-        if collect_datetime_str:
-            formatted_collect_dt = self.format_collect_datetime(collect_datetime_str)
-        attrs = {
-            "arrival_time": arrival_time,
-            "time_left": time_left,
-            "arrival_datetime": arrival_datetime.isoformat() if arrival_datetime else "알 수 없음",
-            "vehicle_number": bus_info.get(self.ATTR_MAP["vehicle_number"], "알 수 없음"),
-            "current_stop": bus_info.get(self.ATTR_MAP["current_stop"], "알 수 없음"),
-            "vehicle_state_message": bus_info.get(self.ATTR_MAP["vehicle_state_message"], "알 수 없음"),
-            "remain_seat": bus_info.get(self.ATTR_MAP["remain_seat"], "-1"),
-            "updated_at": formatted_collect_dt,
-            "last_vehicle": bus_info.get(self.ATTR_MAP["last_vehicle"], "알 수 없음"),
-            "bus_stop_count": bus_info.get(self.ATTR_MAP["bus_stop_count"], "알 수 없음"),
-        }
-        if arrival_time <= 0:
-            attrs["vehicle_state_message"] = bus_info.get(self.ATTR_MAP["vehicle_state_message"], "정보 없음")
-        return attrs
+        return {"arrivals": [arrival.as_dict() for arrival in summary.upcoming]}
+
+
+class KoreaBusSeatSensor(KoreaBusAggregateSensor):
+    """Sensor for the remaining seats of the next bus with free seats."""
+
+    KEY = "remain_seat"
+    NAME = "다음 버스 잔여 좌석"
+    _attr_icon = "mdi:seat-passenger"
+    _attr_state_class = SensorStateClass.MEASUREMENT
+
+    @property
+    def native_value(self):
+        summary = self.coordinator.summary
+        return summary.next_seat.remain_seat if summary and summary.next_seat else None
+
+    @property
+    def extra_state_attributes(self):
+        summary = self.coordinator.summary
+        return summary.next_seat.as_dict() if summary and summary.next_seat else {}
+
+
+# key: (name, unit, metric reader)
+DIAGNOSTIC_SENSORS = {
+    "latency": ("응답 지연", UnitOfTime.MILLISECONDS, lambda m: m.latency_ms),
+    "response_size": ("응답 크기", UnitOfInformation.BYTES, lambda m: m.response_size),
+    "decode_time": ("디코딩 시간", UnitOfTime.MILLISECONDS, lambda m: m.decode_ms),
+    "requests": ("요청 수", None, lambda m: m.requests),
+    "cache_hits": ("캐시 적중 수", None, lambda m: m.cache_hits + m.not_modified + m.unchanged),
+    "failures": ("요청 실패 수", None, lambda m: m.failures),
+    "entities_notified": ("엔티티 알림 수", None, lambda m: m.entities_notified),
+}
+
+
+class KoreaBusDiagnosticSensor(CoordinatorEntity, SensorEntity):
+    """Diagnostic sensor reporting request metrics of the bus stop."""
+
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+
+    def __init__(self, coordinator, entry, bus_stop_id, key):
+        super().__init__(coordinator, bus_stop_id)
+        self.key = key
+        self.bus_stop_id = bus_stop_id
+        name, unit, self._reader = DIAGNOSTIC_SENSORS[key]
+        self._attr_unique_id = f"{entry.entry_id}_{bus_stop_id}_{key}"
+        self._attr_name = f"{name} ({bus_stop_id})"
+        self._attr_native_unit_of_measurement = unit
+        self._attr_state_class = (
+            SensorStateClass.MEASUREMENT if unit else SensorStateClass.TOTAL_INCREASING
+        )
 
     @property
     def available(self) -> bool:
-        bus_data = self.coordinator.data.get(self.bus_number)
-        if not self.coordinator.last_update_success or not bus_data:
-            return False
-        arrival_time_str = bus_data.get(self.ATTR_MAP["arrival_time"], '0')
-        try:
-            int(arrival_time_str)
-            return True
-        except (ValueError, TypeError):
-            return False
+        # Request metrics stay meaningful when the last update failed
+        return self._metrics() is not None
+
+    def _metrics(self) -> StopMetrics | None:
+        return self.coordinator.hub.metrics(self.bus_stop_id)
+
+    @property
+    def native_value(self):
+        metrics = self._metrics()
+        if metrics is None:
+            return None
+        value = self._reader(metrics)
+        if isinstance(value, Histogram):
+            return round(value.last, 2) if value.count else None
+        return value
+
+    @property
+    def extra_state_attributes(self):
+        metrics = self._metrics()
+        if metrics is None:
+            return {}
+        value = self._reader(metrics)
+        if isinstance(value, Histogram):
+            return {
+                "count": value.count,
+                "mean": round(value.mean, 2) if value.count else None,
+                "max": round(value.max, 2),
+            }
+        if self.key == "failures":
+            return {
+                "consecutive_failures": metrics.consecutive_failures,
+                "last_error": metrics.last_error,
+            }
+        return {}
+
+
+def _route_attributes(route: RouteArrival) -> dict:
+    """Return the route metadata attributes."""
+    return {
+        "next_stop": route.next_stop,
+        "direction": route.direction,
+        "bus_type": route.bus_type,
+        "first_time": route.first_time,
+        "last_time": route.last_time,
+        "intervals": route.intervals,
+    }
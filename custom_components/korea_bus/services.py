@@ -0,0 +1,129 @@
+"""Services for Korea Bus."""
+from __future__ import annotations
+
+import voluptuous as vol
+
+from homeassistant.core import (
+    HomeAssistant,
+    ServiceCall,
+    ServiceResponse,
+    SupportsResponse,
+    callback,
+)
+from homeassistant.exceptions import ServiceValidationError
+import homeassistant.helpers.config_validation as cv
+from homeassistant.util import dt as dt_util
+
+from .const import (
+    DOMAIN,
+    DATA_HISTORY,
+    CONF_BUS_STOP_ID,
+    CONF_BUS_NUMBER,
+    SERVICE_HISTORY_STATISTICS,
+    SERVICE_GET_ARRIVALS,
+    LOOKUP_MAX_STOPS,
+    DEFAULT_LOOKUP_MAX_AGE,
+    MAX_COLLECT_AGE,
+    HUB_CACHE_TTL,
+)
+from .projection import RouteArrival, project_buses
+
+ATTR_DAYS = "days"
+ATTR_BUS_STOP_IDS = "bus_stop_ids"
+ATTR_BUS_NUMBERS = "bus_numbers"
+ATTR_MAX_AGE = "max_age"
+
+HISTORY_STATISTICS_SCHEMA = vol.Schema({
+    vol.Optional(CONF_BUS_STOP_ID): cv.string,
+    vol.Optional(CONF_BUS_NUMBER): cv.string,
+    vol.Optional(ATTR_DAYS, default=7): vol.All(vol.Coerce(int), vol.Range(min=1, max=365)),
+})
+
+GET_ARRIVALS_SCHEMA = vol.Schema({
+    vol.Required(ATTR_BUS_STOP_IDS): vol.All(
+        cv.ensure_list, [cv.string], vol.Length(min=1, max=LOOKUP_MAX_STOPS)
+    ),
+    vol.Optional(ATTR_BUS_NUMBERS, default=[]): vol.All(cv.ensure_list, [cv.string]),
+    vol.Optional(ATTR_MAX_AGE, default=DEFAULT_LOOKUP_MAX_AGE): vol.All(
+        # Fetches within the hub's cache window are always shared
+        vol.Coerce(int), vol.Range(min=HUB_CACHE_TTL, max=MAX_COLLECT_AGE)
+    ),
+})
+
+
+def _route_response(route: RouteArrival) -> dict:
+    """Return the arrivals of a route as service response data."""
+    return {
+        "direction": route.direction,
+        "next_stop": route.next_stop,
+        "vehicles": [
+            {
+                "arrival_datetime": vehicle.arrival_at.isoformat(),
+                "vehicle_number": vehicle.vehicle_number,
+                "bus_stop_count": vehicle.bus_stop_count,
+                "current_stop": vehicle.current_stop,
+                "remain_seat": vehicle.remain_seat,
+            }
+            for vehicle in route.vehicles
+            if vehicle.arrival_at is not None
+        ],
+    }
+
+
+@callback
+def async_setup_services(hass: HomeAssistant) -> None:
+    """Register the Korea Bus services."""
+
+    async def async_history_statistics(call: ServiceCall) -> ServiceResponse:
+        """Return headway and ETA error statistics from the arrival history."""
+        # Only entries recording history open the log and start its flush timer
+        if DATA_HISTORY not in hass.data[DOMAIN]:
+            raise ServiceValidationError("도착 기록이 켜진 설정 항목이 없습니다")
+        # Loads numpy, so only when the service is called
+        from .history import async_get_history
+
+        history = await async_get_history(hass)
+        return await history.async_statistics(
+            call.data[ATTR_DAYS],
+            call.data.get(CONF_BUS_STOP_ID),
+            call.data.get(CONF_BUS_NUMBER),
+        )
+
+    async def async_get_arrivals(call: ServiceCall) -> ServiceResponse:
+        """Return the arrivals of any stops, fetching only the stale ones."""
+        from . import get_hub
+
+        results = await get_hub(hass).async_lookup(
+            call.data[ATTR_BUS_STOP_IDS], call.data[ATTR_MAX_AGE]
+        )
+        wanted = call.data[ATTR_BUS_NUMBERS]
+        now = dt_util.now()
+        stops = {}
+        for bus_stop_id, result in results.items():
+            if isinstance(result, Exception):
+                stops[bus_stop_id] = {"error": str(result) or type(result).__name__}
+                continue
+            bus_numbers = wanted or [bus.get("name") for bus in result]
+            stops[bus_stop_id] = {
+                "routes": {
+                    bus_number: _route_response(route)
+                    for bus_number, route in project_buses(result, bus_numbers, now).items()
+                }
+            }
+        return {"stops": stops}
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_GET_ARRIVALS,
+        async_get_arrivals,
+        schema=GET_ARRIVALS_SCHEMA,
+        supports_response=SupportsResponse.ONLY,
+    )
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_HISTORY_STATISTICS,
+        async_history_statistics,
+        schema=HISTORY_STATISTICS_SCHEMA,
+        supports_response=SupportsResponse.ONLY,
+    )
@@ -0,0 +1,93 @@
+"""Persisted last-known arrivals for Korea Bus."""
+from __future__ import annotations
+
+import logging
+import time
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+
+from .const import (
+    DOMAIN,
+    DATA_SNAPSHOTS,
+    STORAGE_VERSION,
+    STORAGE_KEY_SNAPSHOTS,
+    SNAPSHOT_MAX_AGE,
+    SNAPSHOT_SAVE_DELAY,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class SnapshotStore:
+    """Last received arrival records of every stop of every config entry.
+
+    Only the raw records of the tracked routes are kept, so a restored
+    snapshot is projected again and its ETAs are anchored to the original
+    ``collectDateTime`` rather than to the time of the restart. Saves are
+    delayed long enough that they are written at shutdown rather than after
+    every refresh.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize the snapshot store."""
+        self._store = Store(hass, STORAGE_VERSION, STORAGE_KEY_SNAPSHOTS)
+        self._entries: dict[str, dict] = {}
+
+    async def async_load(self) -> None:
+        """Load the snapshots from storage."""
+        if (data := await self._store.async_load()) is None:
+            return
+        self._entries = data.get("entries", {})
+
+    @callback
+    def _data_to_save(self) -> dict:
+        return {"entries": self._entries}
+
+    def get(self, entry_id: str, bus_stop_id: str) -> list[dict] | None:
+        """Return the saved records of a stop if they are recent enough."""
+        snapshot = self._entries.get(entry_id, {}).get(bus_stop_id)
+        if snapshot is None:
+            return None
+        # Older ETAs can no longer be anchored to their collect time
+        if time.time() - snapshot.get("saved_at", 0) > SNAPSHOT_MAX_AGE:
+            _LOGGER.debug("정류장 %s 저장된 도착 정보가 오래되어 사용하지 않습니다", bus_stop_id)
+            return None
+        return snapshot.get("buses", [])
+
+    @callback
+    def async_save(
+        self,
+        entry_id: str,
+        bus_stop_id: str,
+        buses_info: list[dict],
+        bus_numbers: list[str],
+    ) -> None:
+        """Remember the records of the tracked routes of a stop."""
+        wanted = set(bus_numbers)
+        self._entries.setdefault(entry_id, {})[bus_stop_id] = {
+            "saved_at": time.time(),
+            "buses": [bus for bus in buses_info if bus.get("name") in wanted],
+        }
+        self._store.async_delay_save(self._data_to_save, SNAPSHOT_SAVE_DELAY)
+
+    @callback
+    def async_remove(self, entry_id: str) -> None:
+        """Forget the snapshot of a removed entry."""
+        if self._entries.pop(entry_id, None) is not None:
+            self._store.async_delay_save(self._data_to_save, SNAPSHOT_SAVE_DELAY)
+
+
+async def async_get_snapshot_store(hass: HomeAssistant) -> SnapshotStore:
+    """Return the shared snapshot store, loading it on first use."""
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    if DATA_SNAPSHOTS not in domain_data:
+        # Registered before loading so entries set up concurrently share one store
+        domain_data[DATA_SNAPSHOTS] = hass.async_create_task(_async_load_snapshots(hass))
+    return await domain_data[DATA_SNAPSHOTS]
+
+
+async def _async_load_snapshots(hass: HomeAssistant) -> SnapshotStore:
+    snapshots = SnapshotStore(hass)
+    await snapshots.async_load()
+    return snapshots
@@ -0,0 +1,182 @@
+"""Persistent bus stop search index for Korea Bus."""
+from __future__ import annotations
+
+import logging
+import time
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+
+from .const import (
+    DOMAIN,
+    DATA_STOP_INDEX,
+    STORAGE_VERSION,
+    STORAGE_KEY_STOP_INDEX,
+    STOP_INDEX_TTL,
+    STOP_INDEX_MAX_QUERIES,
+    SEARCH_PAGE_SIZE,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+CHOSUNG = "ㄱㄲㄴㄷㄸㄹㅁㅂㅃㅅㅆㅇㅈㅉㅊㅋㅌㅍㅎ"
+HANGUL_FIRST = 0xAC00
+HANGUL_LAST = 0xD7A3
+# Syllables sharing an initial consonant (21 vowels x 28 finals)
+CHOSUNG_SPAN = 588
+
+SAVE_DELAY = 10
+
+# Keys of a search result as returned by the config flow scraper
+RESULT_KEYS = ("name", "stop_number", "direction", "location", "bus_types", "title")
+
+
+def normalize(text: str) -> str:
+    """Normalize a query or title for matching."""
+    return "".join(text.split()).lower()
+
+
+def to_chosung(text: str) -> str:
+    """Return the initial consonants of the Hangul syllables in a string."""
+    return "".join(
+        CHOSUNG[(ord(ch) - HANGUL_FIRST) // CHOSUNG_SPAN]
+        if HANGUL_FIRST <= ord(ch) <= HANGUL_LAST
+        else ch
+        for ch in text
+    )
+
+
+def is_chosung(text: str) -> bool:
+    """Return whether a query consists of initial consonants only."""
+    return bool(text) and all(ch in CHOSUNG for ch in text)
+
+
+class BusStopIndex:
+    """Local index of every bus stop seen in searches and station scrapes.
+
+    Repeated searches are answered from the index while fresh. Refinements
+    of a cached query (e.g. ``강남역`` after ``강남``) are filtered locally
+    when that query returned less than a full result page, and chosung
+    queries such as ``ㄱㄴㅇ`` are matched against every indexed stop
+    without a remote call.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize the index."""
+        self._store = Store(hass, STORAGE_VERSION, STORAGE_KEY_STOP_INDEX)
+        self._stops: dict[str, dict] = {}
+        self._queries: dict[str, dict] = {}
+        self._buses: dict[str, dict] = {}
+
+    async def async_load(self) -> None:
+        """Load the index from storage."""
+        if (data := await self._store.async_load()) is None:
+            return
+        self._stops = data.get("stops", {})
+        self._queries = data.get("queries", {})
+        self._buses = data.get("buses", {})
+
+    @callback
+    def _data_to_save(self) -> dict:
+        return {
+            "stops": self._stops,
+            "queries": self._queries,
+            "buses": self._buses,
+        }
+
+    @staticmethod
+    def _fresh(item: dict | None) -> bool:
+        return item is not None and time.time() - item["updated"] < STOP_INDEX_TTL
+
+    @staticmethod
+    def _result(stop: dict) -> dict:
+        return {key: stop[key] for key in RESULT_KEYS}
+
+    def _matches(self, stop: dict, query: str) -> bool:
+        if is_chosung(query):
+            return query in to_chosung(normalize(stop["name"]))
+        return query in normalize(stop["name"]) or normalize(stop["stop_number"]).startswith(query)
+
+    def match(self, query: str) -> dict[str, dict]:
+        """Match a query against every indexed stop, regardless of age."""
+        query = normalize(query)
+        return {
+            stop_id: self._result(stop)
+            for stop_id, stop in self._stops.items()
+            if self._matches(stop, query)
+        }
+
+    def search(self, query: str) -> dict[str, dict] | None:
+        """Return cached results for a query, or None when a fetch is needed."""
+        query = normalize(query)
+        if not query:
+            return None
+        if is_chosung(query):
+            return self.match(query) or None
+
+        cached = self._queries.get(query)
+        if self._fresh(cached):
+            return {
+                stop_id: self._result(self._stops[stop_id])
+                for stop_id in cached["ids"]
+                if stop_id in self._stops
+            }
+
+        # A fresh broader query already covers this refinement, unless
+        # Kakao cut its results off at a full page
+        for cached_query, cached in self._queries.items():
+            if cached_query in query and cached.get("complete") and self._fresh(cached):
+                results = {
+                    stop_id: self._result(self._stops[stop_id])
+                    for stop_id in cached["ids"]
+                    if stop_id in self._stops and self._matches(self._stops[stop_id], query)
+                }
+                if results:
+                    return results
+        return None
+
+    @callback
+    def async_add_search(self, query: str, results: dict[str, dict]) -> None:
+        """Record the stops returned for a search query."""
+        now = time.time()
+        for stop_id, result in results.items():
+            self._stops[stop_id] = {**result, "updated": now}
+
+        query = normalize(query)
+        self._queries.pop(query, None)
+        self._queries[query] = {
+            "ids": list(results),
+            "updated": now,
+            "complete": len(results) < SEARCH_PAGE_SIZE,
+        }
+        while len(self._queries) > STOP_INDEX_MAX_QUERIES:
+            self._queries.pop(next(iter(self._queries)))
+        self._store.async_delay_save(self._data_to_save, SAVE_DELAY)
+
+    def buses(self, bus_stop_id: str) -> list[dict] | None:
+        """Return the cached bus numbers of a stop while fresh."""
+        cached = self._buses.get(bus_stop_id)
+        return cached["buses"] if self._fresh(cached) else None
+
+    @callback
+    def async_add_buses(self, bus_stop_id: str, buses: list[dict]) -> None:
+        """Record the bus numbers scraped for a stop."""
+        self._buses[bus_stop_id] = {"buses": buses, "updated": time.time()}
+        if (stop := self._stops.get(bus_stop_id)) is not None:
+            stop["bus_numbers"] = [bus["number"] for bus in buses]
+        self._store.async_delay_save(self._data_to_save, SAVE_DELAY)
+
+
+async def async_get_stop_index(hass: HomeAssistant) -> BusStopIndex:
+    """Return the shared stop index, loading it on first use."""
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    if DATA_STOP_INDEX not in domain_data:
+        # Registered before loading so concurrent callers share one index
+        domain_data[DATA_STOP_INDEX] = hass.async_create_task(_async_load_index(hass))
+    return await domain_data[DATA_STOP_INDEX]
+
+
+async def _async_load_index(hass: HomeAssistant) -> BusStopIndex:
+    index = BusStopIndex(hass)
+    await index.async_load()
+    return index
@@ -0,0 +1,175 @@
+"""Arrival transition events for Korea Bus."""
+from __future__ import annotations
+
+from homeassistant.core import HomeAssistant, callback
+
+from .const import (
+    DOMAIN,
+    DATA_TRANSITIONS,
+    EVENT_APPROACHING,
+    EVENT_ARRIVED,
+    EVENT_VEHICLE_CHANGED,
+    EVENT_LAST_VEHICLE,
+    HISTORY_ARRIVED_ETA,
+)
+from .projection import FetchLog, RouteArrival, VehicleArrival, parse_int
+
+
+def parse_thresholds(value: str | None) -> dict[str, int]:
+    """Parse ``100=3, 12345:7012=5`` into thresholds by bus number or stop:bus key.
+
+    Raises ValueError for an entry that is not ``key=stops``.
+    """
+    thresholds = {}
+    for item in (value or "").split(","):
+        if not item.strip():
+            continue
+        key, _, stops = item.partition("=")
+        if not key.strip() or int(stops) < 0:
+            raise ValueError(item)
+        thresholds[key.strip()] = int(stops)
+    return thresholds
+
+
+def route_threshold(
+    bus_stop_id: str, bus_number: str, thresholds: dict[str, int], default_threshold: int
+) -> int:
+    """Return the approaching threshold of a route, by stop:bus key, bus number or default."""
+    return thresholds.get(
+        f"{bus_stop_id}:{bus_number}", thresholds.get(bus_number, default_threshold)
+    )
+
+
+def detect_transitions(
+    bus_stop_id: str,
+    previous: dict[str, RouteArrival],
+    current: dict[str, RouteArrival],
+    thresholds: dict[str, int],
+    default_threshold: int,
+) -> list[tuple[str, dict]]:
+    """Compare two snapshots of a stop and return the events to fire.
+
+    Only the first approaching vehicle of each route is followed: it
+    approaches when its stop count drops to the route's threshold, arrives
+    when the count reaches zero or it disappears right after being
+    imminent, and a different vehicle taking its place is a change.
+    """
+    events = []
+    for bus_number, route in current.items():
+        if (before_route := previous.get(bus_number)) is None:
+            continue
+        before = before_route.vehicles[0]
+        after = route.vehicles[0]
+        threshold = route_threshold(bus_stop_id, bus_number, thresholds, default_threshold)
+        data = {"bus_stop_id": bus_stop_id, "bus_number": bus_number}
+        same = bool(after.vehicle_number) and after.vehicle_number == before.vehicle_number
+        count_before = parse_int(before.bus_stop_count)
+        count_after = parse_int(after.bus_stop_count)
+
+        if before.vehicle_number and not same:
+            # A vehicle already at zero stops was reported when it got there
+            if count_before != 0 and _imminent(before, count_before):
+                events.append((EVENT_ARRIVED, {**data, "vehicle_number": before.vehicle_number}))
+            if after.vehicle_number:
+                events.append((EVENT_VEHICLE_CHANGED, {
+                    **data,
+                    "vehicle_number": after.vehicle_number,
+                    "previous_vehicle_number": before.vehicle_number,
+                }))
+        elif same and count_after == 0 and count_before not in (None, 0):
+            events.append((EVENT_ARRIVED, {**data, "vehicle_number": after.vehicle_number}))
+
+        if (
+            after.vehicle_number
+            and count_after is not None
+            and 0 < count_after <= threshold
+            and not (same and count_before is not None and count_before <= threshold)
+        ):
+            events.append((EVENT_APPROACHING, {
+                **data,
+                "vehicle_number": after.vehicle_number,
+                "bus_stop_count": count_after,
+                "threshold": threshold,
+                "arrival_datetime": after.arrival_at.isoformat() if after.arrival_at else None,
+            }))
+
+        if _is_last(after.last_vehicle) and not (same and _is_last(before.last_vehicle)):
+            events.append((EVENT_LAST_VEHICLE, {**data, "vehicle_number": after.vehicle_number}))
+    return events
+
+
+class TransitionTracker:
+    """Fire the transitions of every fetch of a stop once across all entries.
+
+    Entries sharing a stop process the same fetch; the first one to process
+    a route compares it with the previous fetch and fires its events. The
+    others only fire the approaching events of a threshold that was not
+    handled for that fetch yet, so every entry's thresholds apply.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize the tracker."""
+        self.hass = hass
+        # (stop, route) -> previous and current record, thresholds handled for it
+        self._routes: dict[
+            tuple[str, str], tuple[RouteArrival | None, RouteArrival, set[int]]
+        ] = {}
+        self._fetches = FetchLog()
+
+    @callback
+    def async_process(
+        self,
+        bus_stop_id: str,
+        buses_info: list[dict],
+        routes: dict[str, RouteArrival],
+        thresholds: dict[str, int],
+        default_threshold: int,
+    ) -> None:
+        """Compare a fetch of a stop with the previous one and fire its events."""
+        for name, route in routes.items():
+            key = (bus_stop_id, name)
+            fetched = self._routes.get(key)
+            if self._fetches.first(bus_stop_id, name, buses_info):
+                fetched = self._routes[key] = (
+                    fetched[1] if fetched is not None else None, route, set()
+                )
+            previous, _, handled = fetched
+            threshold = route_threshold(bus_stop_id, name, thresholds, default_threshold)
+            if previous is None or threshold in handled:
+                continue
+            # Other events of this fetch were fired by the first entry to process it
+            approaching_only = bool(handled)
+            handled.add(threshold)
+            for event_type, event_data in detect_transitions(
+                bus_stop_id, {name: previous}, {name: route}, thresholds, default_threshold
+            ):
+                if approaching_only and event_type != EVENT_APPROACHING:
+                    continue
+                self.hass.bus.async_fire(event_type, event_data)
+
+    @callback
+    def async_forget(self, bus_stop_id: str) -> None:
+        """Forget the last fetch and records of a stop nobody subscribes to anymore."""
+        self._fetches.forget(bus_stop_id)
+        for key in [key for key in self._routes if key[0] == bus_stop_id]:
+            del self._routes[key]
+
+
+def get_transition_tracker(hass: HomeAssistant) -> TransitionTracker:
+    """Return the shared transition tracker, creating it on first use."""
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    if DATA_TRANSITIONS not in domain_data:
+        domain_data[DATA_TRANSITIONS] = TransitionTracker(hass)
+    return domain_data[DATA_TRANSITIONS]
+
+
+def _imminent(vehicle: VehicleArrival, bus_stop_count: int | None) -> bool:
+    """Return whether a vehicle was about to reach the stop."""
+    if bus_stop_count is not None and bus_stop_count <= 1:
+        return True
+    return vehicle.arrival_time is not None and 0 < vehicle.arrival_time <= HISTORY_ARRIVED_ETA
+
+
+def _is_last(value) -> bool:
+    """Return whether Kakao flags the vehicle as the last one of the day."""
+    return value is True or str(value).upper() in ("Y", "TRUE", "1")
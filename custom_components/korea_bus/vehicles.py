@@ -0,0 +1,158 @@
+"""Vehicle tracking across bus stops for Korea Bus."""
+from __future__ import annotations
+
+from collections import OrderedDict
+from datetime import datetime
+
+from homeassistant.core import HomeAssistant, callback
+
+from .const import DOMAIN, DATA_VEHICLES, VEHICLE_EXPIRY
+from .projection import FetchLog, RouteArrival, parse_int
+
+
+class Sighting:
+    """The last report of a vehicle approaching one stop."""
+
+    __slots__ = ("bus_number", "arrival_at", "bus_stop_count", "seen", "passed")
+
+    def __init__(
+        self, bus_number: str, arrival_at: float, bus_stop_count: int | None, seen: float
+    ) -> None:
+        """Initialize the sighting."""
+        self.bus_number = bus_number
+        self.arrival_at = arrival_at
+        self.bus_stop_count = bus_stop_count
+        self.seen = seen
+        # Set once the vehicle is no longer listed at the stop
+        self.passed = False
+
+
+class Travel:
+    """The latest travel time of a route between two stops."""
+
+    __slots__ = ("seconds", "vehicle_number", "measured")
+
+    def __init__(self, seconds: float, vehicle_number: str, measured: float) -> None:
+        """Initialize the travel time."""
+        self.seconds = seconds
+        self.vehicle_number = vehicle_number
+        self.measured = measured
+
+
+class VehicleIndex:
+    """Where every approaching vehicle is, by vehicle number, across all stops.
+
+    Each fetch updates the sightings of the vehicles it lists, marks the ones
+    that left the list as passed and refreshes the travel times between the
+    stops a vehicle is known at. Vehicles are kept in the order they were last
+    seen, so expiring them only looks at the oldest ones.
+    """
+
+    def __init__(self) -> None:
+        """Initialize the index."""
+        self._vehicles: OrderedDict[str, dict[str, Sighting]] = OrderedDict()
+        self._last_seen: dict[str, float] = {}
+        self._listed: dict[tuple[str, str], set[str]] = {}
+        self._travel: dict[tuple[str, str, str], Travel] = {}
+        self._fetches = FetchLog()
+
+    @callback
+    def async_update(
+        self,
+        bus_stop_id: str,
+        buses_info: list[dict],
+        routes: dict[str, RouteArrival],
+        now: datetime,
+    ) -> None:
+        """Index the vehicles of a fetch of one stop."""
+        timestamp = now.timestamp()
+        for name, route in routes.items():
+            key = (bus_stop_id, name)
+            # Entries sharing a stop see the same fetch; index it once
+            if not self._fetches.first(bus_stop_id, name, buses_info):
+                continue
+
+            listed = set()
+            for vehicle in route.vehicles:
+                if not vehicle.vehicle_number or vehicle.arrival_at is None:
+                    continue
+                number = vehicle.vehicle_number
+                listed.add(number)
+                sighting = Sighting(
+                    name, vehicle.arrival_at.timestamp(), parse_int(vehicle.bus_stop_count), timestamp
+                )
+                sightings = self._vehicles.setdefault(number, {})
+                sightings[bus_stop_id] = sighting
+                self._vehicles.move_to_end(number)
+                self._last_seen[number] = timestamp
+                for other, previous in sightings.items():
+                    if other != bus_stop_id and previous.bus_number == name:
+                        self._measure(name, number, previous, other, sighting, bus_stop_id)
+
+            for number in self._listed.get(key, set()) - listed:
+                if (sighting := self._vehicles.get(number, {}).get(bus_stop_id)) is not None:
+                    sighting.passed = True
+            self._listed[key] = listed
+
+        self._expire(timestamp)
+
+    @callback
+    def async_forget(self, bus_stop_id: str) -> None:
+        """Forget everything seen at a stop nobody subscribes to anymore."""
+        self._fetches.forget(bus_stop_id)
+        for key in [key for key in self._listed if key[0] == bus_stop_id]:
+            del self._listed[key]
+        for key in [key for key in self._travel if bus_stop_id in key[1:]]:
+            del self._travel[key]
+        for number in [
+            number for number, sightings in self._vehicles.items() if bus_stop_id in sightings
+        ]:
+            del self._vehicles[number][bus_stop_id]
+            if not self._vehicles[number]:
+                del self._vehicles[number]
+                del self._last_seen[number]
+
+    def _measure(
+        self,
+        bus_number: str,
+        vehicle_number: str,
+        first: Sighting,
+        first_stop: str,
+        second: Sighting,
+        second_stop: str,
+    ) -> None:
+        """Record the time the vehicle needs between two stops."""
+        if first.arrival_at > second.arrival_at:
+            first, first_stop, second, second_stop = second, second_stop, first, first_stop
+        self._travel[(bus_number, first_stop, second_stop)] = Travel(
+            second.arrival_at - first.arrival_at, vehicle_number, second.seen
+        )
+
+    def _expire(self, now: float) -> None:
+        """Forget vehicles that have not been listed anywhere for a while."""
+        while self._vehicles:
+            number = next(iter(self._vehicles))
+            if now - self._last_seen[number] <= VEHICLE_EXPIRY:
+                break
+            del self._vehicles[number]
+            del self._last_seen[number]
+
+    def vehicle(self, vehicle_number: str) -> dict[str, Sighting]:
+        """Return the sightings of a vehicle by stop."""
+        return self._vehicles.get(vehicle_number, {})
+
+    def travel(self, bus_number: str, from_stop: str, to_stop: str) -> Travel | None:
+        """Return the latest travel time of a route from one stop to another."""
+        return self._travel.get((bus_number, from_stop, to_stop))
+
+    def __len__(self) -> int:
+        """Return the number of tracked vehicles."""
+        return len(self._vehicles)
+
+
+def get_vehicle_index(hass: HomeAssistant) -> VehicleIndex:
+    """Return the shared vehicle index, creating it on first use."""
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    if DATA_VEHICLES not in domain_data:
+        domain_data[DATA_VEHICLES] = VehicleIndex()
+    return domain_data[DATA_VEHICLES]
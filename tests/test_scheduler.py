@@ -0,0 +1,80 @@
+"""Tests for the service hours of the polling scheduler."""
+from __future__ import annotations
+
+from datetime import datetime, time
+import importlib.util
+from pathlib import Path
+import sys
+import types
+from zoneinfo import ZoneInfo
+
+import pytest
+
+INTEGRATION = Path(__file__).resolve().parent.parent / "custom_components" / "korea_bus"
+
+# The scheduler only needs the time zone lookup of Home Assistant's dt
+# helpers; load it without importing the integration package
+if importlib.util.find_spec("homeassistant") is None:
+    _dt = types.ModuleType("homeassistant.util.dt")
+    _dt.get_time_zone = ZoneInfo
+    _util = types.ModuleType("homeassistant.util")
+    _util.dt = _dt
+    sys.modules["homeassistant"] = types.ModuleType("homeassistant")
+    sys.modules["homeassistant.util"] = _util
+    sys.modules["homeassistant.util.dt"] = _dt
+
+_package = types.ModuleType("korea_bus_scheduler")
+_package.__path__ = [str(INTEGRATION)]
+sys.modules["korea_bus_scheduler"] = _package
+_spec = importlib.util.spec_from_file_location(
+    "korea_bus_scheduler.scheduler", INTEGRATION / "scheduler.py"
+)
+scheduler = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(scheduler)
+
+KST = ZoneInfo("Asia/Seoul")
+
+
+@pytest.mark.parametrize(
+    ("first", "last"),
+    [
+        ("04:00", "04:00"),
+        ("00:00", "24:00"),
+        ("0000", "2400"),
+        (None, "23:00"),
+        ("05:30", ""),
+    ],
+)
+def test_all_day_or_unknown_span(first, last) -> None:
+    assert scheduler.parse_service_span(first, last) is None
+
+
+@pytest.mark.parametrize("last", ["01:30", "25:30"])
+def test_span_past_midnight(last: str) -> None:
+    span = scheduler.parse_service_span("05:30", last)
+    assert span == (time(5, 30), time(1, 30))
+    assert scheduler.ServiceCalendar((span,)).windows == ((0, 7200), (19800, 86400))
+
+
+def test_span_ending_at_midnight() -> None:
+    assert scheduler.parse_service_span("05:00", "24:00") == (time(5, 0), time(0, 0))
+
+
+def test_all_day_route_has_no_calendar() -> None:
+    spans = (scheduler.parse_service_span("05:00", "23:00"), None)
+    assert scheduler.service_calendar(spans) is None
+
+
+@pytest.mark.parametrize(
+    ("now", "wait"),
+    [
+        # Buses leaving at 23:00 still reach the stop within the grace window
+        (datetime(2026, 1, 1, 23, 20, tzinfo=KST), 0),
+        (datetime(2026, 1, 1, 23, 30, tzinfo=KST), 5.5 * 3600),
+        (datetime(2026, 1, 2, 4, 0, tzinfo=KST), 3600),
+        (datetime(2026, 1, 2, 5, 0, tzinfo=KST), 0),
+    ],
+)
+def test_seconds_until_service(now: datetime, wait: float) -> None:
+    calendar = scheduler.service_calendar((scheduler.parse_service_span("05:00", "23:00"),))
+    assert calendar.seconds_until_service(now) == wait
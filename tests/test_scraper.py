@@ -0,0 +1,90 @@
+"""Golden-file tests for the searchView and busStationInfo parsers."""
+from __future__ import annotations
+
+import importlib.util
+import json
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+FIXTURES = Path(__file__).resolve().parent / "fixtures"
+PAGES = ROOT / "benchmarks" / "fixtures"
+
+# The scraper only uses the standard library; load it without importing
+# the integration package, which needs Home Assistant
+_spec = importlib.util.spec_from_file_location(
+    "korea_bus_scraper", ROOT / "custom_components" / "korea_bus" / "scraper.py"
+)
+scraper = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(scraper)
+
+
+def _expected(name: str):
+    return json.loads((FIXTURES / f"{name}.json").read_text(encoding="utf-8"))
+
+
+@pytest.mark.parametrize(
+    ("page", "expected"),
+    [
+        (PAGES / "searchView.html", "searchView"),
+        (FIXTURES / "searchView_edge.html", "searchView_edge"),
+    ],
+)
+def test_parse_bus_stop_list(page: Path, expected: str) -> None:
+    assert scraper.parse_bus_stop_list(page.read_text(encoding="utf-8")) == _expected(expected)
+
+
+@pytest.mark.parametrize(
+    ("page", "expected"),
+    [
+        (PAGES / "busStationInfo.html", "busStationInfo"),
+        (FIXTURES / "busStationInfo_edge.html", "busStationInfo_edge"),
+    ],
+)
+def test_parse_bus_number_list(page: Path, expected: str) -> None:
+    assert scraper.parse_bus_number_list(page.read_text(encoding="utf-8")) == _expected(expected)
+
+
+@pytest.fixture
+def stops() -> dict[str, dict]:
+    return scraper.parse_bus_stop_list(
+        (FIXTURES / "searchView_edge.html").read_text(encoding="utf-8")
+    )
+
+
+def test_missing_number_label_is_skipped(stops) -> None:
+    assert "BS10000" not in stops
+
+
+def test_unclosed_and_void_tags(stops) -> None:
+    stop = stops["BS10001"]
+    assert stop["direction"] == "석촌호수 방면"
+    assert stop["location"] == "서울 송파구 잠실동"
+    assert stop["bus_types"] == ["간선", "광역"]
+
+
+def test_character_references(stops) -> None:
+    stop = stops["BS10002"]
+    assert stop["name"] == "Lotte & World, 롯데월드"
+    assert stop["direction"] == '"잠실"\xa0방면'
+    assert stop["location"] == "서울 <송파구>"
+
+
+def test_missing_title_is_skipped(stops) -> None:
+    assert "BS10003" not in stops
+    assert all(isinstance(stop["name"], str) for stop in stops.values())
+
+
+def test_missing_location_and_bus_types(stops) -> None:
+    assert stops["BS10004"]["location"] == "Unknown"
+    assert stops["BS10004"]["bus_types"] == []
+
+
+def test_bus_number_edge_cases() -> None:
+    buses = scraper.parse_bus_number_list(
+        (FIXTURES / "busStationInfo_edge.html").read_text(encoding="utf-8")
+    )
+    assert [bus["number"] for bus in buses] == ["340", "3216A", "N13"]
+    assert buses[0]["type"] == "Unknown"
+    assert buses[2]["type"] == "심야&순환"